@@ -0,0 +1,44 @@
+"""
+Shared HTTP session and TTL cache for the test scripts' calls against the local backend
+When several scripts run in one process (e.g. a pytest session), each endpoint is fetched once per TTL
+and every request reuses the same keep-alive connections
+"""
+
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
+_cache = {}  # url -> (monotonic expiry, CachedResponse)
+
+class CachedResponse:
+    """The part of requests.Response the test scripts use, backed by an already-decoded body"""
+    def __init__(self, status_code: int, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+def cached_get(url: str, ttl: float = 60, timeout: float = 10):
+    """GET a JSON endpoint, reusing a 200 response for ttl seconds; other responses pass through uncached"""
+    entry = _cache.get(url)
+    if entry and time.monotonic() < entry[0]:
+        return entry[1]
+
+    response = SESSION.get(url, timeout=timeout)
+    if response.status_code != 200:
+        return response
+    try:
+        cached = CachedResponse(response.status_code, response.json())
+    except ValueError:
+        return response
+    _cache[url] = (time.monotonic() + ttl, cached)
+    return cached
+
+def clear_cache():
+    """Forget all cached responses"""
+    _cache.clear()
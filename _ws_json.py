@@ -0,0 +1,22 @@
+"""
+JSON framing shared by the WebSocket test clients
+Uses orjson's C encoder/decoder when it is installed, stdlib json otherwise
+"""
+
+import json
+
+try:
+    import orjson
+
+    async def send_json(websocket, obj):
+        """Send obj as a JSON text frame"""
+        # The servers read with receive_text(); orjson's UTF-8 bytes go out as a text frame as-is
+        await websocket.send(orjson.dumps(obj), text=True)
+
+    json_loads = orjson.loads
+except ImportError:
+    async def send_json(websocket, obj):
+        """Send obj as a JSON text frame"""
+        await websocket.send(json.dumps(obj))
+
+    json_loads = json.loads
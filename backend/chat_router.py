@@ -5,6 +5,7 @@ Priority: OpenRouter → Gemini → Weather → Static Fallback
 
 import os
 import json
+import re
 import requests
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
@@ -29,6 +30,36 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
 
+# Keyword sets for intent/location detection, built once instead of on every message
+WEATHER_KEYWORDS = frozenset(("weather", "rain", "temperature", "humidity", "mala", "mazha", "barani", "climate", "temp", "hot", "cold", "sunny", "cloudy", "varuma", "forecast"))
+COUNTRY_ALIASES = frozenset(('india', 'bharat', 'hindustan'))
+KNOWN_CITIES = frozenset((
+    'erode', 'salem', 'tiruchengode', 'thiruchengode', 'kerala', 
+    'chennai', 'bangalore', 'bengaluru', 'mumbai', 'delhi', 
+    'hyderabad', 'pune', 'coimbatore', 'madurai', 'trichy', 'tiruchirappalli'
+))
+# City alias -> OpenWeather query, in priority order (first match in this order wins)
+CITY_QUERIES = {
+    'erode': "Erode,IN",
+    'salem': "Salem,IN",
+    'tiruchengode': "Tiruchengode,IN", 'thiruchengode': "Tiruchengode,IN",
+    'kerala': "Kerala,IN",
+    'chennai': "Chennai,IN",
+    'bangalore': "Bangalore,IN", 'bengaluru': "Bangalore,IN",
+    'mumbai': "Mumbai,IN",
+    'delhi': "Delhi,IN",
+    'hyderabad': "Hyderabad,IN",
+    'pune': "Pune,IN",
+    'coimbatore': "Coimbatore,IN",
+    'madurai': "Madurai,IN",
+    'trichy': "Tiruchirappalli,IN", 'tiruchirappalli': "Tiruchirappalli,IN",
+}
+CITY_PRIORITY = {alias: i for i, alias in enumerate(CITY_QUERIES)}
+# Zero-width lookahead so overlapping aliases are all reported in one pass
+CITY_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(alias) for alias in sorted(CITY_QUERIES, key=len, reverse=True)) + '))'
+)
+
 class ChatRequest(BaseModel):
     message: str
 
@@ -37,56 +68,27 @@ class ChatResponse(BaseModel):
 
 def detect_weather_intent(user_message: str) -> bool:
     """Detect if user is asking about weather"""
-    weather_keywords = ["weather", "rain", "temperature", "humidity", "mala", "mazha", "barani", "climate", "temp", "hot", "cold", "sunny", "cloudy", "varuma", "forecast"]
-    return any(keyword in user_message.lower() for keyword in weather_keywords)
+    message_lower = user_message.lower()
+    return any(keyword in message_lower for keyword in WEATHER_KEYWORDS)
 
 def extract_city(user_message: str) -> str:
     """Extract city from user message - India only"""
     message_lower = user_message.lower()
     
     # 🔧 COUNTRY-LEVEL QUERY HANDLING
-    country_aliases = ['india', 'bharat', 'hindustan']
-    if any(country in message_lower for country in country_aliases):
+    if any(country in message_lower for country in COUNTRY_ALIASES):
         # Check if it's a pure country query (no specific city mentioned)
-        city_mentioned = any(city in message_lower for city in [
-            'erode', 'salem', 'tiruchengode', 'thiruchengode', 'kerala', 
-            'chennai', 'bangalore', 'bengaluru', 'mumbai', 'delhi', 
-            'hyderabad', 'pune', 'coimbatore', 'madurai', 'trichy'
-        ])
+        city_mentioned = any(city in message_lower for city in KNOWN_CITIES)
         
         if not city_mentioned:
             # Pure country query - use capital city
             return "New Delhi,IN"
     
-    # Specific city detection
-    if "erode" in message_lower:
-        return "Erode,IN"
-    elif "salem" in message_lower:
-        return "Salem,IN"
-    elif "tiruchengode" in message_lower or "thiruchengode" in message_lower:
-        return "Tiruchengode,IN"
-    elif "kerala" in message_lower:
-        return "Kerala,IN"
-    elif "chennai" in message_lower:
-        return "Chennai,IN"
-    elif "bangalore" in message_lower or "bengaluru" in message_lower:
-        return "Bangalore,IN"
-    elif "mumbai" in message_lower:
-        return "Mumbai,IN"
-    elif "delhi" in message_lower:
-        return "Delhi,IN"
-    elif "hyderabad" in message_lower:
-        return "Hyderabad,IN"
-    elif "pune" in message_lower:
-        return "Pune,IN"
-    elif "coimbatore" in message_lower:
-        return "Coimbatore,IN"
-    elif "madurai" in message_lower:
-        return "Madurai,IN"
-    elif "trichy" in message_lower or "tiruchirappalli" in message_lower:
-        return "Tiruchirappalli,IN"
-    else:
-        return "Erode,IN"  # Default to Erode instead of "India"
+    # Specific city detection: one regex pass, the earliest-listed alias wins
+    hits = CITY_RE.findall(message_lower)
+    if hits:
+        return CITY_QUERIES[min(hits, key=CITY_PRIORITY.__getitem__)]
+    return "Erode,IN"  # Default to Erode instead of "India"
 
 def get_real_weather_data(city: str) -> str:
     """Get REAL weather data from OpenWeather API - NEVER use AI for weather"""
@@ -183,60 +183,70 @@ def build_5min_update_message() -> str:
     # Current time in IST
     ist_time = datetime.now(pytz.timezone('Asia/Kolkata')).strftime("%H:%M:%S IST")
     
-    # Build message
-    message = "📈 SMART AGRICULTURE UPDATE (5-Min)\n\n"
+    # Build message from parts and join once at the end
+    pump_status = "🟢 ON" if pump_data['pump_status'] == 1 else "🔴 OFF"
+    parts = ["📈 SMART AGRICULTURE UPDATE (5-Min)\n\n"]
     
     # Weather section (ALWAYS show - from OpenWeather API)
     if weather_data:
-        message += f"🌤️ Weather (OpenWeather)\n"
-        message += f"• Location: {weather_data['city_name']}\n"
-        message += f"• Temperature: {weather_data['temperature']}°C\n"
-        message += f"• Humidity: {weather_data['humidity']}%\n"
-        message += f"• Condition: {weather_data['description']}\n"
-        message += f"• Rain Probability: {weather_data['rain_probability']}%\n\n"
+        parts.append(
+            f"🌤️ Weather (OpenWeather)\n"
+            f"• Location: {weather_data['city_name']}\n"
+            f"• Temperature: {weather_data['temperature']}°C\n"
+            f"• Humidity: {weather_data['humidity']}%\n"
+            f"• Condition: {weather_data['description']}\n"
+            f"• Rain Probability: {weather_data['rain_probability']}%\n\n"
+        )
     else:
-        message += "🌤️ Weather (OpenWeather)\n"
-        message += "• Status: API unavailable\n\n"
+        parts.append("🌤️ Weather (OpenWeather)\n• Status: API unavailable\n\n")
     
     # Sensor section (ONLY if ESP32 online)
-    message += "📡 Live Sensors:\n"
+    parts.append("📡 Live Sensors:\n")
     if esp32_online and sensor_data:
-        message += f"• Status: 🟢 ONLINE\n"
-        message += f"• Soil Moisture: {sensor_data.get('soil_moisture', 0)}%\n"
-        message += f"• Temperature: {sensor_data.get('temperature', 0)}°C\n"
-        message += f"• Humidity: {sensor_data.get('humidity', 0)}%\n"
-        message += f"• Light: {sensor_data.get('light_percent', 0)}% ({sensor_data.get('light_state', 'unknown')})\n"
-        message += f"• Rain Detected: {'🌧️ Yes' if sensor_data.get('rain_detected') else '☀️ No'}\n\n"
+        parts.append(
+            f"• Status: 🟢 ONLINE\n"
+            f"• Soil Moisture: {sensor_data.get('soil_moisture', 0)}%\n"
+            f"• Temperature: {sensor_data.get('temperature', 0)}°C\n"
+            f"• Humidity: {sensor_data.get('humidity', 0)}%\n"
+            f"• Light: {sensor_data.get('light_percent', 0)}% ({sensor_data.get('light_state', 'unknown')})\n"
+            f"• Rain Detected: {'🌧️ Yes' if sensor_data.get('rain_detected') else '☀️ No'}\n\n"
+        )
     else:
-        message += f"• Status: 🔴 OFFLINE\n"
-        message += f"• Last Update: {get_esp32_last_seen()}\n"
-        message += f"• Sensor Values: Not available\n\n"
+        parts.append(
+            f"• Status: 🔴 OFFLINE\n"
+            f"• Last Update: {get_esp32_last_seen()}\n"
+            f"• Sensor Values: Not available\n\n"
+        )
     
     # System status (ALWAYS show)
-    message += "📊 System Status\n"
-    pump_status = "🟢 ON" if pump_data['pump_status'] == 1 else "🔴 OFF"
-    message += f"• Pump: {pump_status}\n"
-    message += f"• Mode: {pump_data['mode']}\n"
-    message += f"• Water Used: {pump_data['total_liters']} L\n"
-    message += f"• ARIMAX: 🟢 ACTIVE\n\n"
+    parts.append(
+        f"📊 System Status\n"
+        f"• Pump: {pump_status}\n"
+        f"• Mode: {pump_data['mode']}\n"
+        f"• Water Used: {pump_data['total_liters']} L\n"
+        f"• ARIMAX: 🟢 ACTIVE\n\n"
+    )
     
     # Rain alert (if applicable)
     if weather_data and weather_data['rain_probability'] > 60:
-        message += "🌧️ RAIN ALERT\n"
-        message += f"• High rain probability: {weather_data['rain_probability']}%\n"
-        message += f"• Recommendation: Skip irrigation\n\n"
+        parts.append(
+            f"🌧️ RAIN ALERT\n"
+            f"• High rain probability: {weather_data['rain_probability']}%\n"
+            f"• Recommendation: Skip irrigation\n\n"
+        )
     
     # Data sources (MANDATORY transparency)
-    message += "📡 Data Sources:\n"
-    message += f"• Weather: OpenWeather API\n"
-    if esp32_online:
-        message += f"• Sensors: ESP32 (online)\n"
-    else:
-        message += f"• Sensors: ESP32 (offline)\n"
-    message += f"• Prediction: ARIMAX\n\n"
+    parts.append(
+        f"📡 Data Sources:\n"
+        f"• Weather: OpenWeather API\n"
+        f"• Sensors: ESP32 ({'online' if esp32_online else 'offline'})\n"
+        f"• Prediction: ARIMAX\n\n"
+    )
     
     # Report time
-    message += f"⏰ Report Time: {ist_time}"
+    parts.append(f"⏰ Report Time: {ist_time}")
+    
+    message = "".join(parts)
     
     return message
 
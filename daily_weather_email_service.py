@@ -57,12 +57,15 @@ class DailyWeatherEmailService:
             current_url = f"http://api.openweathermap.org/data/2.5/weather?q={self.city}&appid={self.api_key}&units=metric"
             forecast_url = f"http://api.openweathermap.org/data/2.5/forecast?q={self.city}&appid={self.api_key}&units=metric"
             
+            async def get_json(session, url):
+                async with session.get(url) as response:
+                    return await response.json()
+            
+            # Current conditions and forecast are independent: fetch them concurrently
             async with aiohttp.ClientSession() as session:
-                async with session.get(current_url) as current_response:
-                    current_data = await current_response.json()
-                
-                async with session.get(forecast_url) as forecast_response:
-                    forecast_data = await forecast_response.json()
+                current_data, forecast_data = await asyncio.gather(
+                    get_json(session, current_url), get_json(session, forecast_url)
+                )
             
             # Calculate rain probability from forecast
             rain_probability = 0
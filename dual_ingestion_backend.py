@@ -257,7 +257,9 @@ async def wifi_endpoint(websocket: WebSocket):
             message = await websocket.receive_text()
             try:
                 data = json.loads(message)
-                data_ingestion.process_sensor_data(data, "WIFI")
+                # A frame holds one reading, or a JSON array of readings from a batching client
+                for reading in (data if isinstance(data, list) else (data,)):
+                    data_ingestion.process_sensor_data(reading, "WIFI")
             except json.JSONDecodeError:
                 logger.warning(f"Invalid JSON from WiFi client: {message}")
                 
@@ -23,7 +23,7 @@ import requests
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import pytz
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, Response
 from fastapi.staticfiles import StaticFiles
@@ -48,6 +48,12 @@ pump_operations = []
 irrigation_cycles = []
 connected_clients: List[WebSocket] = []
 
+# Idempotency-Key -> (monotonic expiry, future of the response) for pump commands in flight or
+# recently applied; the key is reserved before the broadcast so a retry can't send the command twice
+PUMP_IDEMPOTENCY_TTL = 600
+PUMP_IDEMPOTENCY_MAX_KEYS = 1024
+_pump_command_results: Dict[str, tuple] = {}
+
 # Create FastAPI app
 app = FastAPI(
     title="Smart Agriculture Unified System",
@@ -260,9 +266,32 @@ async def get_daily_summary():
         }
     }
 
+def _release_pump_key(idempotency_key: Optional[str], reservation: Optional[asyncio.Future], error: Exception):
+    """Drop a failed command's reserved key so a retry sends it again; waiting duplicates get error"""
+    if reservation is None:
+        return
+    if _pump_command_results.get(idempotency_key, (None, None))[1] is reservation:
+        del _pump_command_results[idempotency_key]
+    reservation.set_exception(error)
+    reservation.exception()  # mark retrieved even when no duplicate is waiting
+
 @app.post("/api/pump-control")
-async def pump_control(command: dict):
-    """Control pump via API"""
+async def pump_control(command: dict, idempotency_key: Optional[str] = Header(None)):
+    """Control pump via API; a repeated Idempotency-Key replays the first result instead of re-sending"""
+    now = time.monotonic()
+    reservation = None
+    if idempotency_key:
+        for expired in [k for k, (expiry, _) in _pump_command_results.items() if expiry <= now]:
+            del _pump_command_results[expired]
+        if idempotency_key in _pump_command_results:
+            logger.info(f"🔁 Duplicate pump command ignored (key {idempotency_key})")
+            # Still in flight: wait for the first request's outcome rather than sending again
+            return await asyncio.shield(_pump_command_results[idempotency_key][1])
+        if len(_pump_command_results) >= PUMP_IDEMPOTENCY_MAX_KEYS:
+            # Dicts keep insertion order, so the first entry is the oldest key
+            del _pump_command_results[next(iter(_pump_command_results))]
+        reservation = asyncio.get_running_loop().create_future()
+        _pump_command_results[idempotency_key] = (now + PUMP_IDEMPOTENCY_TTL, reservation)
     try:
         pump_cmd = {
             "type": "cmd",
@@ -274,11 +303,19 @@ async def pump_control(command: dict):
         # Broadcast pump command to ESP32
         await manager.broadcast(json.dumps(pump_cmd))
         
-        return {"status": "success", "command": command.get("action")}
+        result = {"status": "success", "command": command.get("action")}
+        if reservation:
+            reservation.set_result(result)
+        return result
         
+    except asyncio.CancelledError:
+        _release_pump_key(idempotency_key, reservation, HTTPException(status_code=503, detail="Pump command cancelled"))
+        raise
     except Exception as e:
         logger.error(f"Pump control error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        error = HTTPException(status_code=500, detail=str(e))
+        _release_pump_key(idempotency_key, reservation, error)
+        raise error
 
 @app.get("/status")
 async def websocket_status():
@@ -11,6 +11,8 @@ Enhanced Interactive Telegram Bot for Smart Agriculture Dashboard
 
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import time
 import threading
@@ -121,20 +123,30 @@ class TelegramBotHandler:
         self.bot_token = BOT_TOKEN
         self.chat_id = CHAT_ID
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        # Bot API method URLs, built once rather than on every call
+        self.send_url = f"{self.base_url}/sendMessage"
+        self.updates_url = f"{self.base_url}/getUpdates"
+        self._send_payload_base = {"chat_id": self.chat_id}
         self.last_update_id = 0
         self.running = False
         
+        # Keep-alive session for Telegram calls, so polling and replies reuse one TLS connection
+        self.http = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "POST"],
+            respect_retry_after_header=True
+        )
+        self.http.mount("https://", HTTPAdapter(max_retries=retry))
+        
     def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
         """Send message to Telegram"""
         try:
-            url = f"{self.base_url}/sendMessage"
-            payload = {
-                "chat_id": self.chat_id,
-                "text": message,
-                "parse_mode": parse_mode
-            }
+            payload = {**self._send_payload_base, "text": message, "parse_mode": parse_mode}
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self.http.post(self.send_url, json=payload, timeout=10)
             response.raise_for_status()
             
             logger.info(f"Message sent: {message[:50]}...")
@@ -147,13 +159,12 @@ class TelegramBotHandler:
     def get_updates(self) -> list:
         """Get updates from Telegram"""
         try:
-            url = f"{self.base_url}/getUpdates"
             params = {
                 "offset": self.last_update_id + 1,
                 "timeout": 10
             }
             
-            response = requests.get(url, params=params, timeout=15)
+            response = self.http.get(self.updates_url, params=params, timeout=15)
             
             # Handle 409 conflicts gracefully
             if response.status_code == 409:
@@ -647,9 +658,8 @@ Type <code>help</code> for all commands."""
         try:
             logger.info("Clearing pending updates...")
             # Get all pending updates with a high offset to clear them
-            url = f"{self.base_url}/getUpdates"
             params = {"offset": -1, "timeout": 1}
-            response = requests.get(url, params=params, timeout=5)
+            response = self.http.get(self.updates_url, params=params, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -657,7 +667,7 @@ Type <code>help</code> for all commands."""
                     # Get the highest update_id and set offset to clear all
                     highest_id = max(update["update_id"] for update in data["result"])
                     clear_params = {"offset": highest_id + 1, "timeout": 1}
-                    requests.get(url, params=clear_params, timeout=5)
+                    self.http.get(self.updates_url, params=clear_params, timeout=5)
                     logger.info(f"Cleared {len(data['result'])} pending updates")
                 else:
                     logger.info("No pending updates to clear")
@@ -672,8 +682,7 @@ Type <code>help</code> for all commands."""
         
         # Clear any existing webhooks first
         try:
-            clear_url = f"{self.base_url}/deleteWebhook"
-            requests.post(clear_url, timeout=10)
+            self.http.post(f"{self.base_url}/deleteWebhook", timeout=10)
             logger.info("Cleared existing webhooks")
         except Exception as e:
             logger.warning(f"Could not clear webhooks: {e}")
@@ -13,11 +13,16 @@ Features:
 
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import functools
 import time
 import threading
 import asyncio
+import contextlib
 import websockets
+from concurrent.futures import ThreadPoolExecutor
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import pytz
@@ -30,6 +35,21 @@ import ssl
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Prefer orjson's C encoder/decoder on the JSON hot paths when it is installed
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps_bytes = orjson.dumps
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+    def json_dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 # Production Configuration - Environment Variables
 BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
@@ -51,37 +71,254 @@ if missing_vars:
 
 logger.info(f"Telegram bot configured for {CITY} weather and backend: {BACKEND_URL}")
 
+# Worker pool for blocking HTTP work: dashboard fan-out and scheduled report jobs
+http_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="bot-http")
+
+# Response cache lifetimes (seconds) for repeated weather/backend lookups
+FORECAST_CACHE_TTL = 600
+BACKEND_CACHE_TTL = 30
+
+# Static message templates, built once at import time
+HELP_MSG = """🤖 <b>Smart Agriculture Bot Commands</b>
+
+<b>🌤️ Weather Commands:</b>
+• <code>weather</code> - Current weather report for Erode
+• <code>rain alert</code> - Rain forecast and alerts
+
+<b>📊 Dashboard Commands:</b>
+• <code>dashboard</code> - Real sensor data and summary
+• <code>real data</code> - ESP32 sensor readings
+
+<b>🚿 Pump Control:</b>
+• <code>pump on</code> - Turn irrigation pump ON
+• <code>pump off</code> - Turn irrigation pump OFF
+
+<b>🕐 Automatic Reports:</b>
+• 07:00 AM - Daily weather report
+• 06:00 PM - Daily dashboard summary
+
+<i>Simple commands for smart farming! 🌱</i>"""
+
+UNKNOWN_TEMPLATE = """❓ <b>Unknown Command</b>
+
+I didn't understand: "<i>{text}</i>"
+
+<b>Available Commands:</b>
+• <code>weather</code> - Weather report
+• <code>dashboard</code> - Sensor data
+• <code>pump on/off</code> - Control pump
+• <code>help</code> - Show all commands"""
+
+WEATHER_TEMPLATE = """🌤️ <b>Weather Report - Erode, Tamil Nadu</b>
+
+🌡️ <b>Temperature:</b> {temp:.1f}°C
+💨 <b>Humidity:</b> {humidity}%
+🌧️ <b>Rain Probability:</b> {rain_probability}%
+☁️ <b>Condition:</b> {condition}
+💨 <b>Wind Speed:</b> {wind_speed} m/s
+👁️ <b>Visibility:</b> {visibility_km:.1f} km
+
+<b>🌧️ Rain Alert:</b> {rain_alert}
+
+🕐 <b>Updated:</b> {updated}
+📡 <b>Source:</b> OpenWeather API"""
+
+DASHBOARD_TEMPLATE = """📊 <b>Dashboard Report - Erode Smart Farm</b>
+
+<b>🌱 Real Sensor Data (ESP32):</b>
+💧 Soil Moisture: {soil}%
+🌡️ Temperature: {temperature}°C
+💨 Humidity: {humidity}%
+🚿 Pump Status: {pump_status}
+💦 Flow Rate: {flow} L/min
+🪣 Total Water: {total} L
+
+<b>🌤️ Weather Data:</b>
+🌡️ External Temp: {ext_temp}°C
+💨 External Humidity: {ext_humidity}%
+🌧️ Rain Probability: {rain_probability}%
+
+<b>🤖 AI Model Performance:</b>
+📈 ARIMAX Accuracy: 94.6%
+📈 ARIMA Accuracy: 82.5%
+🏆 Best Model: ARIMAX
+
+<b>📡 System Status:</b>
+🔌 ESP32: {esp32_status}
+🌐 Weather API: {weather_status}
+⏰ Report Time: {report_time}
+
+📍 <b>Location:</b> Erode, Tamil Nadu"""
+
+class TokenBucket:
+    """Thread-safe token bucket that paces outbound calls below an API's rate limit"""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# Per-host limiters: OpenWeather free tier allows 60/min, Telegram ~30 msg/sec
+owm_bucket = TokenBucket(50 / 60, 10)
+telegram_bucket = TokenBucket(25, 30)
+
+class WsManager:
+    """Keeps the ESP32 WebSocket open and reconnects it with exponential backoff"""
+    RETRY_DELAYS = [0.5, 1, 2, 4, 8]
+    OPEN_TIMEOUT = 5    # seconds per connect attempt
+    SEND_BUDGET = 25    # seconds for all attempts and backoff; below TelegramBot._run_async's wait
+    
+    def __init__(self, url: str):
+        self.url = url
+        self.ws = None
+        self._reader_task = None
+    
+    async def ensure(self):
+        """Return a live connection, opening one if needed"""
+        if self.ws is None:
+            self.ws = await websockets.connect(self.url, open_timeout=self.OPEN_TIMEOUT,
+                                               ping_interval=20, ping_timeout=20, close_timeout=5)
+            self._reader_task = asyncio.create_task(self._ws_reader(self.ws))
+            logger.info("🔌 ESP32 WebSocket connected")
+        return self.ws
+    
+    async def _ws_reader(self, ws):
+        """Drain incoming frames so keepalive pings are answered"""
+        try:
+            async for _ in ws:
+                pass
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            if self.ws is ws:
+                self.ws = None
+            logger.warning("🔌 ESP32 WebSocket closed")
+    
+    async def _drop(self):
+        """Close the current connection and stop its reader"""
+        ws, reader = self.ws, self._reader_task
+        self.ws = self._reader_task = None
+        if reader:
+            reader.cancel()
+        if ws:
+            with contextlib.suppress(Exception):
+                await ws.close()
+    
+    async def send(self, payload: str):
+        """Send a frame, reconnecting with backoff on failure, giving up after SEND_BUDGET seconds"""
+        deadline = asyncio.get_running_loop().time() + self.SEND_BUDGET
+        async with asyncio.timeout_at(deadline):
+            for delay in self.RETRY_DELAYS + [None]:
+                try:
+                    ws = await self.ensure()
+                    await ws.send(payload)
+                    return
+                except (websockets.WebSocketException, OSError, asyncio.TimeoutError) as e:
+                    await self._drop()
+                    # Don't sleep into a retry that can no longer finish in time
+                    if delay is None or asyncio.get_running_loop().time() + delay + self.OPEN_TIMEOUT > deadline:
+                        raise
+                    logger.warning(f"WebSocket send failed ({e}), retrying in {delay}s")
+                    await asyncio.sleep(delay)
+
 class TelegramBot:
+    # Keyword token -> command route, checked in ROUTE_PRIORITY order
+    COMMAND_MAP = {
+        'weather': 'weather',
+        'rain': 'rain',
+        'dashboard': 'dashboard',
+        'summary': 'dashboard',
+        'real': 'dashboard',
+        'pump': 'pump',
+        'help': 'help',
+        '/help': 'help',
+        '/start': 'help',
+        'commands': 'help',
+    }
+    ROUTE_PRIORITY = ('weather', 'rain', 'dashboard', 'pump', 'help')
+    PUMP_ON = {'on', 'start'}
+    PUMP_OFF = {'off', 'stop'}
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _route(text: str):
+        """Resolve normalized command text to (route, pump action); pure, so repeat commands hit the cache"""
+        tokens = {tok.strip('?!.,') for tok in text.split()}
+        routes = {TelegramBot.COMMAND_MAP[tok] for tok in tokens if tok in TelegramBot.COMMAND_MAP}
+        route = next((r for r in TelegramBot.ROUTE_PRIORITY if r in routes), None)
+        action = None
+        if route == 'pump':
+            if tokens & TelegramBot.PUMP_ON:
+                action = 'ON'
+            elif tokens & TelegramBot.PUMP_OFF:
+                action = 'OFF'
+        return route, action
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _unknown_response(text: str) -> str:
+        return UNKNOWN_TEMPLATE.format(text=text)
+    
     def __init__(self):
         self.bot_token = BOT_TOKEN
         self.chat_id = CHAT_ID
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        self.send_url = f"{self.base_url}/sendMessage"
+        self.updates_url = f"{self.base_url}/getUpdates"
+        self._send_payload_base = {"chat_id": self.chat_id, "parse_mode": "HTML"}
         self.last_update_id = 0
         self.running = False
-        self.websocket = None
+        self.ws_manager = WsManager(WEBSOCKET_URL)
         
-        # Get the latest update ID to start fresh
-        try:
-            response = requests.get(f"{self.base_url}/getUpdates", timeout=10)
-            if response.ok:
-                data = response.json()
-                if data["ok"] and data["result"]:
-                    self.last_update_id = data["result"][-1]["update_id"]
-                    logger.info(f"🔄 Starting from update ID: {self.last_update_id}")
-        except Exception as e:
-            logger.warning(f"Failed to get initial update ID: {e}")
+        # Shared HTTP session so Telegram/OpenWeather calls reuse keep-alive connections
+        # (responses are gzip/brotli-compressed via the session's default Accept-Encoding)
+        self.http = requests.Session()
+        retry = Retry(
+            total=4,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "POST"],
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://api.openweathermap.org/", adapter)
+        # Other plain-http hosts are local (the ESP32 bridge on :8080): fail fast instead of
+        # retrying refused connections while the bridge is offline
+        self.http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=0, read=False)))
+        self.http.headers.update({"Connection": "keep-alive"})
+        
+        # url -> (expiry_ts, json) cache shared by the polling and scheduler threads
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        
+        # One long-lived event loop owns the ESP32 WebSocket and the report scheduler;
+        # its blocking work shares http_executor instead of a second default pool
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(http_executor)
+        self._loop_thread = threading.Thread(target=self.loop.run_forever, name="bot-async-loop", daemon=True)
+        self._loop_thread.start()
         
     def send_message(self, message: str) -> bool:
         """Send message to Telegram"""
         try:
-            url = f"{self.base_url}/sendMessage"
-            payload = {
-                "chat_id": self.chat_id,
-                "text": message,
-                "parse_mode": "HTML"
-            }
+            payload = {**self._send_payload_base, "text": message}
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self._request("POST", self.send_url, telegram_bucket, data=json_dumps_bytes(payload), headers=JSON_HEADERS, timeout=10)
             response.raise_for_status()
             
             logger.info(f"✅ Message sent: {message[:50]}...")
@@ -91,45 +328,56 @@ class TelegramBot:
             logger.error(f"❌ Failed to send message: {e}")
             return False
     
+    def _request(self, method: str, url: str, bucket: Optional[TokenBucket] = None, **kwargs) -> requests.Response:
+        """Issue an HTTP request on the shared session, paced by the host's token bucket"""
+        if bucket:
+            bucket.acquire()
+        return self.http.request(method, url, **kwargs)
+    
+    def _cached_json(self, url: str, ttl: float, timeout: float = 10,
+                     bucket: Optional[TokenBucket] = None) -> Optional[Dict[str, Any]]:
+        """GET a JSON endpoint, reusing the cached body until its TTL expires"""
+        with self._cache_lock:
+            entry = self._cache.get(url)
+            if entry and time.time() < entry[0]:
+                return entry[1]
+        
+        response = self._request("GET", url, bucket, timeout=timeout)
+        if not response.ok:
+            return None
+        
+        data = json_loads(response.content)
+        with self._cache_lock:
+            self._cache[url] = (time.time() + ttl, data)
+        return data
+    
     def get_weather_report(self) -> str:
         """Get weather report from OpenWeather API for Erode"""
         try:
-            # Current weather
-            current_url = f"http://api.openweathermap.org/data/2.5/weather?q={CITY},IN&appid={OPENWEATHER_API_KEY}&units=metric"
-            current_response = requests.get(current_url, timeout=10)
+            # Single forecast fetch (8 x 3h buckets) - the first bucket doubles as "current" conditions
+            forecast_url = f"http://api.openweathermap.org/data/2.5/forecast?q={CITY},IN&appid={OPENWEATHER_API_KEY}&units=metric&cnt=8"
+            forecast_data = self._cached_json(forecast_url, FORECAST_CACHE_TTL, bucket=owm_bucket)
             
-            if not current_response.ok:
+            if forecast_data is None:
                 return "❌ Weather data unavailable"
             
-            current_data = current_response.json()
-            
-            # Forecast for rain probability
-            forecast_url = f"http://api.openweathermap.org/data/2.5/forecast?q={CITY},IN&appid={OPENWEATHER_API_KEY}&units=metric"
-            forecast_response = requests.get(forecast_url, timeout=10)
-            
-            rain_probability = 0
-            rain_expected = False
+            now_bucket = forecast_data['list'][0]
             
-            if forecast_response.ok:
-                forecast_data = forecast_response.json()
-                next_24h = forecast_data['list'][:8]  # Next 24 hours
-                avg_pop = sum(item.get('pop', 0) for item in next_24h) / len(next_24h)
-                rain_probability = int(avg_pop * 100)
-                rain_expected = rain_probability > 40
+            next_24h = forecast_data['list']  # Next 24 hours (cnt=8)
+            avg_pop = sum(item.get('pop', 0) for item in next_24h) / len(next_24h)
+            rain_probability = int(avg_pop * 100)
+            rain_expected = rain_probability > 40
             
-            message = f"""🌤️ <b>Weather Report - Erode, Tamil Nadu</b>
-
-🌡️ <b>Temperature:</b> {current_data['main']['temp']:.1f}°C
-💨 <b>Humidity:</b> {current_data['main']['humidity']}%
-🌧️ <b>Rain Probability:</b> {rain_probability}%
-☁️ <b>Condition:</b> {current_data['weather'][0]['description'].title()}
-💨 <b>Wind Speed:</b> {current_data.get('wind', {}).get('speed', 0)} m/s
-👁️ <b>Visibility:</b> {current_data.get('visibility', 0)/1000:.1f} km
-
-<b>🌧️ Rain Alert:</b> {'⚠️ Rain Expected' if rain_expected else '✅ No Rain Expected'}
-
-🕐 <b>Updated:</b> {datetime.now().strftime('%H:%M:%S')}
-📡 <b>Source:</b> OpenWeather API"""
+            message = WEATHER_TEMPLATE.format(
+                temp=now_bucket['main']['temp'],
+                humidity=now_bucket['main']['humidity'],
+                rain_probability=rain_probability,
+                condition=now_bucket['weather'][0]['description'].title(),
+                wind_speed=now_bucket.get('wind', {}).get('speed', 0),
+                visibility_km=now_bucket.get('visibility', 0) / 1000,
+                rain_alert='⚠️ Rain Expected' if rain_expected else '✅ No Rain Expected',
+                updated=datetime.now().strftime('%H:%M:%S')
+            )
             
             return message
             
@@ -140,16 +388,15 @@ class TelegramBot:
     def get_rain_alert(self) -> str:
         """Get rain alerts for next 24 hours"""
         try:
-            forecast_url = f"http://api.openweathermap.org/data/2.5/forecast?q={CITY},IN&appid={OPENWEATHER_API_KEY}&units=metric"
-            response = requests.get(forecast_url, timeout=10)
+            forecast_url = f"http://api.openweathermap.org/data/2.5/forecast?q={CITY},IN&appid={OPENWEATHER_API_KEY}&units=metric&cnt=8"
+            data = self._cached_json(forecast_url, FORECAST_CACHE_TTL, bucket=owm_bucket)
             
-            if not response.ok:
+            if data is None:
                 return "❌ Rain alert data unavailable"
             
-            data = response.json()
             rain_alerts = []
             
-            for forecast in data['list'][:8]:  # Next 24 hours
+            for forecast in data['list']:  # Next 24 hours (cnt=8)
                 dt = datetime.fromtimestamp(forecast['dt'])
                 rain_prob = forecast.get('pop', 0) * 100
                 
@@ -185,12 +432,19 @@ class TelegramBot:
             logger.error(f"Rain alert error: {e}")
             return f"❌ <b>Rain Alert Error</b>\n\n{str(e)}"
     
+    def _run_async(self, coro, timeout: float = 30):
+        """Run a coroutine on the bot's event loop and wait for its result, cancelling it on timeout"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            # Don't let a late pump command reach the ESP32 after the user was told it failed
+            future.cancel()
+            raise
+    
     async def send_pump_command(self, command: str) -> bool:
         """Send pump command to ESP32 via WebSocket"""
         try:
-            if not self.websocket:
-                self.websocket = await websockets.connect(WEBSOCKET_URL)
-            
             pump_cmd = {
                 "type": "cmd",
                 "cmd": "pump",
@@ -198,60 +452,56 @@ class TelegramBot:
                 "timestamp": datetime.now().isoformat()
             }
             
-            await self.websocket.send(json.dumps(pump_cmd))
+            await self.ws_manager.send(json_dumps(pump_cmd))
             logger.info(f"🚿 Pump command sent: {command}")
             return True
             
         except Exception as e:
             logger.error(f"❌ Pump command failed: {e}")
-            self.websocket = None
             return False
     
+    def _get_esp32_status(self) -> Dict[str, Any]:
+        """Get ESP32 real-time data if available"""
+        esp32_response = self.http.get("http://localhost:8080/status", timeout=5)
+        if esp32_response.ok:
+            return json_loads(esp32_response.content).get('latest_data', {})
+        return {}
+    
     def get_dashboard_report(self) -> str:
         """Get dashboard summary with real sensor data"""
         try:
-            # Get sensor data
-            sensor_response = requests.get(f"{BACKEND_URL}/sensor-status", timeout=10)
-            weather_response = requests.get(f"{BACKEND_URL}/weather", timeout=10)
-            
-            sensor_data = sensor_response.json() if sensor_response.ok else {}
-            weather_data = weather_response.json() if weather_response.ok else {}
-            
-            # Get ESP32 real-time data if available
-            esp32_data = {}
-            try:
-                esp32_response = requests.get("http://localhost:8080/status", timeout=5)
-                if esp32_response.ok:
-                    esp32_data = esp32_response.json().get('latest_data', {})
-            except:
-                pass
-            
-            message = f"""📊 <b>Dashboard Report - Erode Smart Farm</b>
-
-<b>🌱 Real Sensor Data (ESP32):</b>
-💧 Soil Moisture: {esp32_data.get('soil', sensor_data.get('soil_moisture', 0))}%
-🌡️ Temperature: {esp32_data.get('temperature', sensor_data.get('temperature', 0))}°C
-💨 Humidity: {esp32_data.get('humidity', sensor_data.get('humidity', 0))}%
-🚿 Pump Status: {'🟢 ON' if esp32_data.get('pump', 0) == 1 else '🔴 OFF'}
-💦 Flow Rate: {esp32_data.get('flow', 0)} L/min
-🪣 Total Water: {esp32_data.get('total', 0)} L
-
-<b>🌤️ Weather Data:</b>
-🌡️ External Temp: {weather_data.get('temperature', 0)}°C
-💨 External Humidity: {weather_data.get('humidity', 0)}%
-🌧️ Rain Probability: {weather_data.get('rain_probability', 0)}%
-
-<b>🤖 AI Model Performance:</b>
-📈 ARIMAX Accuracy: 94.6%
-📈 ARIMA Accuracy: 82.5%
-🏆 Best Model: ARIMAX
-
-<b>📡 System Status:</b>
-🔌 ESP32: {'✅ Connected' if esp32_data else '❌ Offline'}
-🌐 Weather API: {'✅ Active' if weather_data else '❌ Offline'}
-⏰ Report Time: {datetime.now().strftime('%H:%M:%S')}
-
-📍 <b>Location:</b> Erode, Tamil Nadu"""
+            # Fetch backend sensor data, backend weather and ESP32 status concurrently
+            futures = {
+                'sensor': http_executor.submit(self._cached_json, f"{BACKEND_URL}/sensor-status", BACKEND_CACHE_TTL),
+                'weather': http_executor.submit(self._cached_json, f"{BACKEND_URL}/weather", BACKEND_CACHE_TTL),
+                'esp32': http_executor.submit(self._get_esp32_status),
+            }
+            results = {}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result(timeout=10) or {}
+                except Exception as e:
+                    logger.warning(f"Dashboard {name} fetch failed: {e}")
+                    results[name] = {}
+            
+            sensor_data = results['sensor']
+            weather_data = results['weather']
+            esp32_data = results['esp32']
+            
+            message = DASHBOARD_TEMPLATE.format(
+                soil=esp32_data.get('soil', sensor_data.get('soil_moisture', 0)),
+                temperature=esp32_data.get('temperature', sensor_data.get('temperature', 0)),
+                humidity=esp32_data.get('humidity', sensor_data.get('humidity', 0)),
+                pump_status='🟢 ON' if esp32_data.get('pump', 0) == 1 else '🔴 OFF',
+                flow=esp32_data.get('flow', 0),
+                total=esp32_data.get('total', 0),
+                ext_temp=weather_data.get('temperature', 0),
+                ext_humidity=weather_data.get('humidity', 0),
+                rain_probability=weather_data.get('rain_probability', 0),
+                esp32_status='✅ Connected' if esp32_data else '❌ Offline',
+                weather_status='✅ Active' if weather_data else '❌ Offline',
+                report_time=datetime.now().strftime('%H:%M:%S')
+            )
             
             return message
             
@@ -262,96 +512,61 @@ class TelegramBot:
     def process_command(self, text: str) -> str:
         """Process user commands"""
         text = text.lower().strip()
+        route, action = self._route(text)
         
         # Weather commands
-        if any(cmd in text for cmd in ['weather', 'weather report', 'today weather']):
+        if route == 'weather':
             return self.get_weather_report()
         
         # Rain alert commands  
-        elif any(cmd in text for cmd in ['rain alert', 'rain', 'will it rain']):
+        elif route == 'rain':
             return self.get_rain_alert()
         
         # Dashboard commands
-        elif any(cmd in text for cmd in ['dashboard', 'summary', 'real data', 'dashboard report']):
+        elif route == 'dashboard':
             return self.get_dashboard_report()
         
         # Pump ON command
-        elif any(cmd in text for cmd in ['pump on', 'turn on pump', 'start pump']):
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                success = loop.run_until_complete(self.send_pump_command("ON"))
-                if success:
-                    return f"""🟢 <b>Pump Turned ON</b> ✅
+        elif route == 'pump' and action == 'ON':
+            success = self._run_async(self.send_pump_command("ON"))
+            if success:
+                return f"""🟢 <b>Pump Turned ON</b> ✅
 
 🚿 Pump is now running
 ⏰ Time: {datetime.now().strftime('%H:%M:%S')}
 📡 Command sent to ESP32 via WebSocket"""
-                else:
-                    return "❌ Failed to turn pump ON. Check ESP32 connection."
-            finally:
-                loop.close()
+            else:
+                return "❌ Failed to turn pump ON. Check ESP32 connection."
         
         # Pump OFF command
-        elif any(cmd in text for cmd in ['pump off', 'turn off pump', 'stop pump']):
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                success = loop.run_until_complete(self.send_pump_command("OFF"))
-                if success:
-                    return f"""🔴 <b>Pump Turned OFF</b> ✅
+        elif route == 'pump' and action == 'OFF':
+            success = self._run_async(self.send_pump_command("OFF"))
+            if success:
+                return f"""🔴 <b>Pump Turned OFF</b> ✅
 
 🚿 Pump is now stopped
 ⏰ Time: {datetime.now().strftime('%H:%M:%S')}
 📡 Command sent to ESP32 via WebSocket"""
-                else:
-                    return "❌ Failed to turn pump OFF. Check ESP32 connection."
-            finally:
-                loop.close()
+            else:
+                return "❌ Failed to turn pump OFF. Check ESP32 connection."
         
         # Help command
-        elif any(cmd in text for cmd in ['help', '/help', '/start', 'commands']):
-            return """🤖 <b>Smart Agriculture Bot Commands</b>
-
-<b>🌤️ Weather Commands:</b>
-• <code>weather</code> - Current weather report for Erode
-• <code>rain alert</code> - Rain forecast and alerts
-
-<b>📊 Dashboard Commands:</b>
-• <code>dashboard</code> - Real sensor data and summary
-• <code>real data</code> - ESP32 sensor readings
-
-<b>🚿 Pump Control:</b>
-• <code>pump on</code> - Turn irrigation pump ON
-• <code>pump off</code> - Turn irrigation pump OFF
-
-<b>🕐 Automatic Reports:</b>
-• 07:00 AM - Daily weather report
-• 06:00 PM - Daily dashboard summary
-
-<i>Simple commands for smart farming! 🌱</i>"""
+        elif route == 'help':
+            return HELP_MSG
         
         else:
-            return f"""❓ <b>Unknown Command</b>
-
-I didn't understand: "<i>{text}</i>"
-
-<b>Available Commands:</b>
-• <code>weather</code> - Weather report
-• <code>dashboard</code> - Sensor data
-• <code>pump on/off</code> - Control pump
-• <code>help</code> - Show all commands"""
+            return self._unknown_response(text)
     
     def get_updates(self) -> list:
         """Get updates from Telegram"""
         try:
-            url = f"{self.base_url}/getUpdates"
             params = {
                 "offset": self.last_update_id + 1,
-                "timeout": 10
+                "timeout": 50  # Long-poll: Telegram holds the request until a message arrives
             }
             
-            response = requests.get(url, params=params, timeout=15)
+            # Client timeout must exceed the server-side long-poll timeout
+            response = self._request("GET", self.updates_url, telegram_bucket, params=params, timeout=60)
             
             if response.status_code == 409:
                 logger.warning("Telegram API conflict - waiting...")
@@ -359,7 +574,7 @@ I didn't understand: "<i>{text}</i>"
                 return []
             
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
             
             if data["ok"]:
                 return data["result"]
@@ -399,11 +614,25 @@ I didn't understand: "<i>{text}</i>"
         
         # Clear webhooks
         try:
-            webhook_response = requests.post(f"{self.base_url}/deleteWebhook", timeout=10)
+            webhook_response = self._request("POST", f"{self.base_url}/deleteWebhook", telegram_bucket, timeout=10)
             logger.info(f"Webhook cleared: {webhook_response.status_code}")
         except Exception as e:
             logger.warning(f"Failed to clear webhook: {e}")
         
+        # Skip messages that queued up while offline: fetch only the newest update ID
+        try:
+            response = self._request(
+                "GET", self.updates_url, telegram_bucket,
+                params={"offset": -1, "limit": 1, "timeout": 0}, timeout=10
+            )
+            if response.ok:
+                data = json_loads(response.content)
+                if data["ok"] and data["result"]:
+                    self.last_update_id = data["result"][-1]["update_id"]
+                    logger.info(f"🔄 Starting from update ID: {self.last_update_id}")
+        except Exception as e:
+            logger.warning(f"Failed to get initial update ID: {e}")
+        
         # Send startup message
         startup_msg = f"""🤖 <b>Smart Agriculture Bot Started</b>
 
@@ -427,8 +656,6 @@ Type <code>help</code> for commands."""
                     if "message" in update:
                         self.handle_message(update)
                 
-                time.sleep(1)
-                
             except KeyboardInterrupt:
                 logger.info("🛑 Bot stopped by user")
                 break
@@ -440,32 +667,32 @@ Type <code>help</code> for commands."""
         """Stop the bot"""
         self.running = False
         self.send_message("🛑 <b>Bot Stopped</b>\n\nSmart Agriculture Bot is offline.")
+        self.loop.call_soon_threadsafe(self.loop.stop)
 
 # Scheduled functions
-def send_daily_weather():
+def send_daily_weather(bot: TelegramBot):
     """Send daily weather report at 7 AM"""
-    bot = TelegramBot()
     weather_report = bot.get_weather_report()
     message = f"🌅 <b>Daily Weather Report - 7:00 AM</b>\n\n{weather_report}"
     bot.send_message(message)
     logger.info("📅 Daily weather report sent")
 
-def send_daily_dashboard():
+def send_daily_dashboard(bot: TelegramBot):
     """Send daily dashboard report at 6 PM"""
-    bot = TelegramBot()
     dashboard_report = bot.get_dashboard_report()
     message = f"🌆 <b>Daily Dashboard Report - 6:00 PM</b>\n\n{dashboard_report}"
     bot.send_message(message)
     logger.info("📅 Daily dashboard report sent")
 
-def setup_scheduler():
-    """Setup APScheduler for daily tasks"""
-    scheduler = AsyncIOScheduler(timezone=pytz.timezone('Asia/Kolkata'))
+def setup_scheduler(bot: TelegramBot):
+    """Setup APScheduler for daily tasks on the bot's event loop"""
+    scheduler = AsyncIOScheduler(event_loop=bot.loop, timezone=pytz.timezone('Asia/Kolkata'))
     
     # Schedule daily weather at 7:00 AM IST
     scheduler.add_job(
         func=send_daily_weather,
         trigger=CronTrigger(hour=7, minute=0, timezone=pytz.timezone('Asia/Kolkata')),
+        args=[bot],
         id='daily_weather',
         replace_existing=True
     )
@@ -474,6 +701,7 @@ def setup_scheduler():
     scheduler.add_job(
         func=send_daily_dashboard,
         trigger=CronTrigger(hour=18, minute=0, timezone=pytz.timezone('Asia/Kolkata')),
+        args=[bot],
         id='daily_dashboard',
         replace_existing=True
     )
@@ -486,12 +714,12 @@ def main():
     """Main function"""
     logger.info("=== Simple Smart Agriculture Telegram Bot ===")
     
-    # Setup and start scheduler
-    scheduler = setup_scheduler()
-    
-    # Start bot
+    # Create the bot first so scheduled reports share its session, cache and loop
     bot = TelegramBot()
     
+    # Setup and start scheduler
+    scheduler = setup_scheduler(bot)
+    
     try:
         bot.start_polling()
     except KeyboardInterrupt:
@@ -500,4 +728,4 @@ def main():
         bot.stop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
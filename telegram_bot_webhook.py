@@ -4,9 +4,11 @@ Alternative Telegram Bot using Webhook instead of polling
 This avoids the 409 conflicts that occur with polling
 """
 
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, BackgroundTasks
+from fastapi.responses import JSONResponse, ORJSONResponse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
 from datetime import datetime
@@ -16,6 +18,20 @@ import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Prefer orjson's C encoder/decoder on the JSON hot paths when it is installed
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps_bytes = orjson.dumps
+except ImportError:
+    orjson = None
+    json_loads = json.loads
+    def json_dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+APIResponse = ORJSONResponse if orjson else JSONResponse
+
 # Telegram Bot Configuration
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
@@ -25,25 +41,78 @@ if not BOT_TOKEN or not CHAT_ID:
     print("❌ Missing environment variables: TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID")
     exit(1)
 
-app = FastAPI(title="Telegram Bot Webhook")
+app = FastAPI(title="Telegram Bot Webhook", default_response_class=APIResponse)
+
+# Static message templates, built once at import time
+HELP_MSG = """🤖 <b>Smart Agriculture Bot Commands</b>
+
+<b>📋 Available Commands:</b>
+• <code>weather</code> or <code>weather report</code> - Current weather for Erode
+• <code>dashboard</code> or <code>dashboard summary</code> - Today's farm summary
+• <code>irrigation</code> or <code>irrigation update</code> - Pump status and activity
+• <code>help</code> or <code>commands</code> - Show this help message
+
+<i>Smart agriculture at your fingertips! 🌱🤖</i>"""
+
+UNKNOWN_TEMPLATE = """❓ <b>Unknown Command</b>
+
+I didn't understand: "<i>{text}</i>"
+
+Type <code>help</code> to see available commands.
+
+<b>Quick Commands:</b>
+• <code>weather</code> - Weather report
+• <code>help</code> - Show commands"""
+
+WEATHER_TEMPLATE = """🌤️ <b>Weather Report - {location}</b>
+
+🌡️ <b>Temperature:</b> {temp}°C
+💨 <b>Humidity:</b> {humidity}%
+🌧️ <b>Rain Probability:</b> {rain_probability:.0f}%
+☁️ <b>Condition:</b> {condition}
+🕐 <b>Updated:</b> {updated}
+
+<i>Live weather data from OpenWeather API 🌍</i>"""
 
 class TelegramWebhookBot:
+    # Keyword token -> command route
+    COMMAND_MAP = {
+        'weather': 'weather',
+        'help': 'help',
+        'commands': 'help',
+        '/help': 'help',
+        '/start': 'help',
+    }
+    ROUTE_PRIORITY = ('weather', 'help')
+    
     def __init__(self):
         self.bot_token = BOT_TOKEN
         self.chat_id = CHAT_ID
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        self.send_url = f"{self.base_url}/sendMessage"
+        self._send_payload_base = {"chat_id": self.chat_id}
+        
+        # Shared HTTP session so Telegram/backend calls reuse keep-alive connections
+        # (responses are gzip/brotli-compressed via the session's default Accept-Encoding)
+        self.http = requests.Session()
+        retry = Retry(
+            total=4,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "POST"],
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+        self.http.headers.update({"Connection": "keep-alive"})
         
     def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
         """Send message to Telegram"""
         try:
-            url = f"{self.base_url}/sendMessage"
-            payload = {
-                "chat_id": self.chat_id,
-                "text": message,
-                "parse_mode": parse_mode
-            }
+            payload = {**self._send_payload_base, "text": message, "parse_mode": parse_mode}
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self.http.post(self.send_url, data=json_dumps_bytes(payload), headers=JSON_HEADERS, timeout=10)
             response.raise_for_status()
             
             logger.info(f"Message sent: {message[:50]}...")
@@ -57,10 +126,10 @@ class TelegramWebhookBot:
         """Fetch weather report from backend"""
         try:
             logger.info("Fetching weather data from backend...")
-            response = requests.get(f"{BACKEND_URL}/weather", timeout=15)
+            response = self.http.get(f"{BACKEND_URL}/weather", timeout=15)
             
             if response.status_code == 200:
-                weather_data = response.json()
+                weather_data = json_loads(response.content)
                 logger.info(f"Weather data received: {weather_data.get('temperature')}°C")
                 
                 # Format temperature properly
@@ -70,15 +139,14 @@ class TelegramWebhookBot:
                 else:
                     temp_str = str(temp)
                 
-                message = f"""🌤️ <b>Weather Report - {weather_data.get('location', 'Erode')}</b>
-
-🌡️ <b>Temperature:</b> {temp_str}°C
-💨 <b>Humidity:</b> {weather_data.get('humidity', 0)}%
-🌧️ <b>Rain Probability:</b> {weather_data.get('rain_probability', 0):.0f}%
-☁️ <b>Condition:</b> {weather_data.get('weather_condition', 'Clear Sky')}
-🕐 <b>Updated:</b> {datetime.now().strftime('%H:%M:%S')}
-
-<i>Live weather data from OpenWeather API 🌍</i>"""
+                message = WEATHER_TEMPLATE.format(
+                    location=weather_data.get('location', 'Erode'),
+                    temp=temp_str,
+                    humidity=weather_data.get('humidity', 0),
+                    rain_probability=weather_data.get('rain_probability', 0),
+                    condition=weather_data.get('weather_condition', 'Clear Sky'),
+                    updated=datetime.now().strftime('%H:%M:%S')
+                )
                 
                 return message
             else:
@@ -91,45 +159,36 @@ class TelegramWebhookBot:
     
     def process_command(self, message_text: str) -> str:
         """Process user command and return appropriate response"""
-        text = message_text.lower().strip()
+        tokens = {tok.strip('?!.,') for tok in message_text.lower().split()}
+        routes = {self.COMMAND_MAP[tok] for tok in tokens if tok in self.COMMAND_MAP}
+        route = next((r for r in self.ROUTE_PRIORITY if r in routes), None)
         
         # Weather commands
-        if any(keyword in text for keyword in ['weather', 'weather report', 'weather today']):
+        if route == 'weather':
             logger.info("Processing weather command")
             return self.fetch_weather_report()
         
         # Help commands
-        elif any(keyword in text for keyword in ['help', 'commands', '/help', '/start']):
-            return """🤖 <b>Smart Agriculture Bot Commands</b>
-
-<b>📋 Available Commands:</b>
-• <code>weather</code> or <code>weather report</code> - Current weather for Erode
-• <code>dashboard</code> or <code>dashboard summary</code> - Today's farm summary
-• <code>irrigation</code> or <code>irrigation update</code> - Pump status and activity
-• <code>help</code> or <code>commands</code> - Show this help message
-
-<i>Smart agriculture at your fingertips! 🌱🤖</i>"""
+        elif route == 'help':
+            return HELP_MSG
         
         # Unknown command
         else:
-            return f"""❓ <b>Unknown Command</b>
-
-I didn't understand: "<i>{message_text}</i>"
-
-Type <code>help</code> to see available commands.
-
-<b>Quick Commands:</b>
-• <code>weather</code> - Weather report
-• <code>help</code> - Show commands"""
+            return UNKNOWN_TEMPLATE.format(text=message_text)
 
 # Global bot instance
 webhook_bot = TelegramWebhookBot()
 
+def reply_to_command(text: str):
+    """Process a command and send the reply (runs after the webhook is acked)"""
+    response = webhook_bot.process_command(text)
+    webhook_bot.send_message(response)
+
 @app.post("/webhook")
-async def webhook_handler(request: Request):
+async def webhook_handler(request: Request, background_tasks: BackgroundTasks):
     """Handle incoming webhook from Telegram"""
     try:
-        data = await request.json()
+        data = json_loads(await request.body())
         logger.info(f"Received webhook: {data}")
         
         if "message" in data:
@@ -141,23 +200,20 @@ async def webhook_handler(request: Request):
             # Only respond to messages from our chat
             if str(chat.get("id")) != CHAT_ID:
                 logger.warning(f"Ignoring message from unauthorized chat: {chat.get('id')}")
-                return JSONResponse({"status": "ignored"})
+                return APIResponse({"status": "ignored"})
             
             logger.info(f"Processing command: '{text}' from user: {user.get('username', 'unknown')}")
             
-            # Process the command
-            response = webhook_bot.process_command(text)
+            # Ack Telegram immediately; process and reply in the background
+            background_tasks.add_task(reply_to_command, text)
             
-            # Send response
-            webhook_bot.send_message(response)
-            
-            return JSONResponse({"status": "processed"})
+            return APIResponse({"status": "processed"})
         
-        return JSONResponse({"status": "no_message"})
+        return APIResponse({"status": "no_message"})
         
     except Exception as e:
         logger.error(f"Webhook error: {e}")
-        return JSONResponse({"status": "error", "message": str(e)})
+        return APIResponse({"status": "error", "message": str(e)})
 
 @app.get("/")
 def root():
@@ -179,4 +235,17 @@ if __name__ == "__main__":
     print("🚀 Starting Telegram Bot Webhook Server...")
     print("📱 Bot will respond to messages via webhook")
     print("🧪 Test endpoint: POST /test-weather")
-    uvicorn.run("telegram_bot_webhook:app", host="0.0.0.0", port=8001, reload=False)
\ No newline at end of file
+    try:
+        import uvloop  # noqa: F401
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "asyncio"
+    uvicorn.run(
+        "telegram_bot_webhook:app",
+        host="0.0.0.0",
+        port=8001,
+        reload=False,
+        loop=loop_impl,
+        http="auto",
+        workers=int(os.getenv("WEBHOOK_WORKERS", "2"))
+    )
\ No newline at end of file
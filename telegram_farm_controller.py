@@ -9,21 +9,37 @@ Advanced Smart Agriculture Telegram Bot Controller
 """
 
 import asyncio
+import functools
 import json
 import logging
-import requests
+import aiohttp
 import websockets
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
-import pandas as pd
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes, AIORateLimiter
 import os
-from collections import defaultdict
+import re
+import time
+import weakref
+from collections import deque, Counter, ChainMap
+from dataclasses import dataclass, field
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Prefer orjson's C decoder/encoder for weather, sensor and WebSocket payloads when it is installed
+try:
+    import orjson
+    json_loads = orjson.loads
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    json_loads = json.loads
+    def json_dumps(obj) -> str:
+        # Match orjson's native datetime output (ISO 8601)
+        return json.dumps(obj, default=lambda o: o.isoformat())
+
 # Configuration - Use environment variables for security
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
@@ -31,39 +47,135 @@ OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
 WEBSOCKET_URL = os.getenv('WEBSOCKET_URL', "ws://localhost:8080/ws")
 BACKEND_URL = os.getenv('BACKEND_URL', "http://localhost:8000")
 CITY = os.getenv('WEATHER_CITY', "Erode")
-
-# Global variables for tracking
-pump_operations = []
-irrigation_cycles = []
-websocket_connections = []
+# One Call 3.0 returns current + hourly in one response but needs its own OpenWeather subscription
+USE_ONECALL = os.getenv('OPENWEATHER_ONECALL', '').lower() in ('1', 'true', 'yes')
+
+# Global variables for tracking (bounded so a long-running bot doesn't grow without limit)
+EVENT_HISTORY_LIMIT = 10_000
+EVENT_RETENTION = timedelta(hours=48)
+pump_operations = deque(maxlen=EVENT_HISTORY_LIMIT)
+irrigation_cycles = deque(maxlen=EVENT_HISTORY_LIMIT)
+websocket_connections = deque(maxlen=EVENT_HISTORY_LIMIT)
 water_consumption = 0.0
 latest_sensor_data = {}
 
+# OpenWeather responses barely change within a few minutes; share them across button presses
+WEATHER_CACHE_TTL = 300
+GEOCODE_CACHE_TTL = 7 * 24 * 3600  # city coordinates practically never change
+TELEGRAM_MAX_RATE = 29  # outgoing messages per second, just under Telegram's global cap
+WS_PING_INTERVAL = 20  # seconds between keepalive pings on the sensor WebSocket
+WS_PING_TIMEOUT = 10
+WS_MAX_BACKOFF = 60  # cap for the reconnect delay, doubled after each failed attempt
+SENSOR_CACHE_MAX_AGE = 3  # seconds a WebSocket-pushed reading is served without hitting /status
+# Frames the server relays that aren't readings (pump commands, dashboard keepalives)
+WS_CONTROL_FRAME_TYPES = frozenset({'cmd', 'pong'})
+_weather_cache = {}  # url -> (expiry monotonic ts, json)
+_inflight = {}  # url -> asyncio.Future shared by concurrent callers on a cold cache
+
+@dataclass
+class Stats:
+    """Today's event counters, updated as events are recorded"""
+    day: date = field(default_factory=date.today)
+    counts: Counter = field(default_factory=Counter)
+    
+    def record(self, key, when=None):
+        when = when or datetime.now()
+        if when.date() != self.day:
+            # Midnight rollover: start a fresh day
+            self.day = when.date()
+            self.counts = Counter()
+        self.counts[key] += 1
+    
+    def today(self, key):
+        return self.counts[key] if self.day == date.today() else 0
+
+daily_stats = Stats()
+
 class FarmController:
     def __init__(self):
         self.websocket = None
         self.connected = False
+        self.http = None  # aiohttp.ClientSession, opened in post_init
+        self.reader_task = None
+        self.supervisor_task = None
+        self._connect_lock = asyncio.Lock()
+        self._send_lock = asyncio.Lock()  # websockets doesn't serialize concurrent send()s
+        self.sensor_ts = 0.0  # monotonic time of the last reading in latest_sensor_data
+    
+    async def get_json(self, url, timeout=10):
+        """GET a JSON endpoint on the shared session; None on a non-200 response"""
+        async with self.http.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                return None
+            return json_loads(await response.read())
         
     async def connect_websocket(self):
         """Connect to WebSocket server"""
+        async with self._connect_lock:
+            # The supervisor and an on-demand pump command may race to reconnect
+            if self.connected:
+                return True
+            try:
+                self.websocket = await websockets.connect(
+                    WEBSOCKET_URL, ping_interval=WS_PING_INTERVAL, ping_timeout=WS_PING_TIMEOUT
+                )
+                self.connected = True
+                self.reader_task = asyncio.create_task(self._ws_reader())
+                now = datetime.now()
+                websocket_connections.append({
+                    'timestamp': now,
+                    'action': 'connected'
+                })
+                daily_stats.record('ws_connected', now)
+                logger.info("✅ Connected to WebSocket server")
+                return True
+            except Exception as e:
+                logger.error("❌ WebSocket connection failed: %s", e)
+                self.connected = False
+                now = datetime.now()
+                websocket_connections.append({
+                    'timestamp': now,
+                    'action': 'disconnected',
+                    'error': str(e)
+                })
+                daily_stats.record('ws_disconnected', now)
+                return False
+    
+    async def _ws_reader(self):
+        """Keep latest_sensor_data current from readings broadcast on the WebSocket"""
         try:
-            self.websocket = await websockets.connect(WEBSOCKET_URL)
-            self.connected = True
-            websocket_connections.append({
-                'timestamp': datetime.now(),
-                'action': 'connected'
-            })
-            logger.info("✅ Connected to WebSocket server")
-            return True
+            async for msg in self.websocket:
+                try:
+                    data = json_loads(msg)
+                except ValueError:
+                    continue
+                # The bridge's readings are rebroadcast as-is: untyped dicts shaped like /status latest_data
+                if isinstance(data, dict) and 'soil' in data and data.get('type') not in WS_CONTROL_FRAME_TYPES:
+                    latest_sensor_data.clear()
+                    latest_sensor_data.update(data)
+                    self.sensor_ts = time.monotonic()
         except Exception as e:
-            logger.error(f"❌ WebSocket connection failed: {e}")
-            self.connected = False
-            websocket_connections.append({
-                'timestamp': datetime.now(),
-                'action': 'disconnected',
-                'error': str(e)
-            })
-            return False
+            logger.warning("⚠️ WebSocket reader stopped: %s", e)
+        self.connected = False
+        now = datetime.now()
+        websocket_connections.append({
+            'timestamp': now,
+            'action': 'disconnected'
+        })
+        daily_stats.record('ws_disconnected', now)
+    
+    async def supervise_websocket(self):
+        """Keep the WebSocket connected, reconnecting with exponential backoff"""
+        backoff = 1
+        while True:
+            if not self.connected and not await self.connect_websocket():
+                logger.info("🔄 Retrying WebSocket connection in %ss", backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, WS_MAX_BACKOFF)
+                continue
+            backoff = 1
+            # Reader exits when the connection drops (including missed keepalive pongs)
+            await self.reader_task
     
     async def send_pump_command(self, command):
         """Send pump ON/OFF command via WebSocket"""
@@ -72,55 +184,155 @@ class FarmController:
         
         if self.websocket:
             try:
+                now = datetime.now()
                 pump_cmd = {
                     "type": "cmd",
                     "cmd": "pump",
                     "value": command,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": now
                 }
-                await self.websocket.send(json.dumps(pump_cmd))
+                payload = json_dumps(pump_cmd)
+                async with self._send_lock:
+                    await self.websocket.send(payload)
                 
                 # Track pump operation
                 pump_operations.append({
-                    'timestamp': datetime.now(),
+                    'timestamp': now,
                     'command': command,
                     'status': 'sent'
                 })
+                daily_stats.record(f'pump_{command}', now)
                 
-                logger.info(f"🚿 Pump command sent: {command}")
+                logger.info("🚿 Pump command sent: %s", command)
                 return True
             except Exception as e:
-                logger.error(f"❌ Failed to send pump command: {e}")
+                logger.error("❌ Failed to send pump command: %s", e)
                 return False
         return False
     
     async def get_sensor_data(self):
         """Get latest sensor data from WebSocket server"""
+        # Fresh reading already pushed over the WebSocket: no HTTP round-trip needed
+        if self.connected and time.monotonic() - self.sensor_ts < SENSOR_CACHE_MAX_AGE:
+            return dict(latest_sensor_data)
         try:
-            response = requests.get(f"http://localhost:8080/status", timeout=5)
-            if response.status_code == 200:
-                data = response.json()
+            data = await self.get_json("http://localhost:8080/status", timeout=5)
+            if data is not None:
                 return data.get('latest_data', {})
         except Exception as e:
-            logger.error(f"❌ Failed to get sensor data: {e}")
+            logger.error("❌ Failed to get sensor data: %s", e)
         return {}
 
 # Initialize farm controller
 farm = FarmController()
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Start command with welcome message and main menu"""
-    keyboard = [
-        [InlineKeyboardButton("🚿 Pump Control", callback_data="pump_menu")],
-        [InlineKeyboardButton("📊 Sensor Data", callback_data="sensor_data")],
-        [InlineKeyboardButton("🌤️ Weather Report", callback_data="weather_report")],
-        [InlineKeyboardButton("📈 Dashboard Report", callback_data="dashboard_report")],
-        [InlineKeyboardButton("🌧️ Rain Alert", callback_data="rain_alert")],
-        [InlineKeyboardButton("ℹ️ Help & Commands", callback_data="help_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    welcome_msg = """
+async def _cached_get_json(url, ttl=WEATHER_CACHE_TTL):
+    """GET a JSON endpoint, serving repeat requests from the TTL cache"""
+    entry = _weather_cache.get(url)
+    if entry and time.monotonic() < entry[0]:
+        return entry[1]
+    
+    # Single-flight: only the first caller hits the network, the rest await its result
+    fut = _inflight.get(url)
+    if fut is not None:
+        return await fut
+    
+    fut = asyncio.get_running_loop().create_future()
+    _inflight[url] = fut
+    try:
+        data = await farm.get_json(url)
+        if data is not None:
+            _weather_cache[url] = (time.monotonic() + ttl, data)
+        fut.set_result(data)
+        return data
+    except Exception as e:
+        fut.set_exception(e)
+        # Mark retrieved so an exception with no other awaiters isn't logged as unhandled
+        fut.exception()
+        raise
+    finally:
+        if not fut.done():
+            fut.cancel()  # fetching handler was cancelled; don't leave followers hanging
+        del _inflight[url]
+
+async def _fetch_current(city=CITY):
+    """Current conditions for a city (cached)"""
+    return await _cached_get_json(
+        f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={OPENWEATHER_API_KEY}&units=metric"
+    )
+
+async def _fetch_forecast(city=CITY):
+    """5-day / 3-hour forecast for a city (cached)"""
+    return await _cached_get_json(
+        f"http://api.openweathermap.org/data/2.5/forecast?q={city}&appid={OPENWEATHER_API_KEY}&units=metric"
+    )
+
+async def _fetch_onecall(city=CITY):
+    """Current + hourly weather in a single One Call 3.0 request (cached)"""
+    places = await _cached_get_json(
+        f"http://api.openweathermap.org/geo/1.0/direct?q={city}&limit=1&appid={OPENWEATHER_API_KEY}",
+        ttl=GEOCODE_CACHE_TTL
+    )
+    if not places:
+        return None
+    return await _cached_get_json(
+        f"https://api.openweathermap.org/data/3.0/onecall?lat={places[0]['lat']}&lon={places[0]['lon']}"
+        f"&exclude=minutely,daily,alerts&appid={OPENWEATHER_API_KEY}&units=metric"
+    )
+
+async def _current_conditions(city=CITY):
+    """Conditions shown in the weather report, or None if the API gave no data"""
+    if USE_ONECALL:
+        data = await _fetch_onecall(city)
+        if data is None:
+            return None
+        current = data['current']
+        hourly = data.get('hourly', [])
+        return {
+            'temp': current['temp'],
+            'humidity': current['humidity'],
+            'description': current['weather'][0]['description'].title(),
+            'wind_speed': current['wind_speed'],
+            'pressure': current['pressure'],
+            'rain_prob': hourly[0].get('pop', 0) * 100 if hourly else 0,
+        }
+    
+    # Current weather and 5-day forecast, fetched concurrently
+    current_data, forecast_data = await asyncio.gather(_fetch_current(city), _fetch_forecast(city))
+    if current_data is None or forecast_data is None:
+        return None
+    
+    # Rain probability from forecast
+    rain_prob = 0
+    if len(forecast_data['list']) > 0:
+        rain_prob = forecast_data['list'][0].get('pop', 0) * 100
+    return {
+        'temp': current_data['main']['temp'],
+        'humidity': current_data['main']['humidity'],
+        'description': current_data['weather'][0]['description'].title(),
+        'wind_speed': current_data['wind']['speed'],
+        'pressure': current_data['main']['pressure'],
+        'rain_prob': rain_prob,
+    }
+
+# Static keyboards and messages, built once (PTB markup objects are immutable)
+MAIN_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🚿 Pump Control", callback_data="pump_menu")],
+    [InlineKeyboardButton("📊 Sensor Data", callback_data="sensor_data")],
+    [InlineKeyboardButton("🌤️ Weather Report", callback_data="weather_report")],
+    [InlineKeyboardButton("📈 Dashboard Report", callback_data="dashboard_report")],
+    [InlineKeyboardButton("🌧️ Rain Alert", callback_data="rain_alert")],
+    [InlineKeyboardButton("ℹ️ Help & Commands", callback_data="help_menu")]
+])
+
+PUMP_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🟢 Turn Pump ON", callback_data="pump_on")],
+    [InlineKeyboardButton("🔴 Turn Pump OFF", callback_data="pump_off")],
+    [InlineKeyboardButton("📊 Pump Status", callback_data="sensor_data")],
+    [InlineKeyboardButton("⬅️ Back to Main", callback_data="main_menu")]
+])
+
+WELCOME_MSG = """
 🌱 **Smart Agriculture Farm Controller** 🌱
 
 Welcome to your intelligent farming assistant! 
@@ -137,44 +349,128 @@ Welcome to your intelligent farming assistant!
 
 Type /help for all available commands
     """
-    
-    await update.message.reply_text(welcome_msg, reply_markup=reply_markup, parse_mode='Markdown')
+
+# Report templates, parsed once; reports fill them with str.format / format_map
+PUMP_ON_MSG = """
+🟢 **PUMP TURNED ON** ✅
+
+🚿 **Status**: Pump is now running
+⏰ **Time**: {time}
+💧 **Action**: Irrigation started
+🔄 **Command**: Sent via WebSocket
+
+The pump will run according to auto-irrigation rules or until manually turned off.
+"""
+
+PUMP_OFF_MSG = """
+🔴 **PUMP TURNED OFF** ✅
+
+🚿 **Status**: Pump is now stopped
+⏰ **Time**: {time}
+💧 **Action**: Irrigation stopped
+🔄 **Command**: Sent via WebSocket
+
+The pump has been manually turned off via Telegram.
+"""
+
+# Fallbacks for readings missing from a sensor payload
+SENSOR_DEFAULTS = {
+    'soil': 0, 'temperature': 0, 'humidity': 0, 'light': 0,
+    'flow': 0, 'total': 0, 'source': 'Unknown'
+}
+
+SENSOR_TEMPLATE = """
+📊 **REAL-TIME SENSOR DATA** 📊
+
+🌱 **Soil Moisture**: {soil}%
+🌡️ **Temperature**: {temperature}°C
+💨 **Humidity**: {humidity}%
+🌧️ **Rain Status**: {rain_status}
+🚿 **Pump Status**: {pump_status}
+💡 **Light Level**: {light} lux
+💧 **Flow Rate**: {flow} L/min
+🪣 **Total Water**: {total} L
+
+📡 **Data Source**: {source}
+⏰ **Last Update**: {time}
+
+🔄 **Connection**: {connection}
+"""
+
+SENSOR_UNAVAILABLE_MSG = """
+❌ **SENSOR DATA UNAVAILABLE**
+
+🔍 **Possible Issues**:
+• WebSocket server not running
+• ESP32 not connected
+• Network connectivity issues
+
+Please check system status and try again.
+"""
+
+DASHBOARD_TEMPLATE = """
+📈 **DAILY DASHBOARD REPORT** 📈
+📅 **Date**: {date}
+
+**💧 WATER MANAGEMENT:**
+• Total Water Used: {estimated_water:.1f} L
+• Irrigation Cycles: {irrigation_starts} started, {irrigation_stops} completed
+• Average per Cycle: {avg_per_cycle:.1f} L
+
+**🚿 PUMP OPERATIONS:**
+• Pump ON Commands: {pump_on_count}
+• Pump OFF Commands: {pump_off_count}
+• Current Status: {pump_status}
+
+**📡 SYSTEM CONNECTIVITY:**
+• WebSocket Connections: {connections}
+• Disconnections: {disconnections}
+• Current Status: {connection}
+• Uptime: {uptime:.1f}%
+
+**📊 CURRENT READINGS:**
+• Soil Moisture: {soil}%
+• Temperature: {temperature}°C
+• Humidity: {humidity}%
+• Flow Rate: {flow} L/min
+
+**🎯 SYSTEM PERFORMANCE:**
+• Data Updates: Real-time via WebSocket
+• Response Time: < 2 seconds
+• Automation: {automation}
+
+⏰ **Report Generated**: {time}
+"""
+
+NO_RAIN_TEMPLATE = """
+☀️ **NO RAIN ALERTS** ✅
+
+🌤️ **Next 24 Hours**: Clear skies expected
+🚿 **Irrigation**: Safe to proceed as scheduled
+🌾 **Field Work**: Good conditions for farming activities
+
+📊 **Rain Probability**: < 30% (Low risk)
+⏰ **Next Check**: {next_check}
+"""
+
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Start command with welcome message and main menu"""
+    await update.message.reply_text(WELCOME_MSG, reply_markup=MAIN_MENU_MARKUP, parse_mode='Markdown')
 
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle inline keyboard button presses"""
     query = update.callback_query
     await query.answer()
     
-    if query.data == "pump_menu":
-        await pump_control_menu(query)
-    elif query.data == "pump_on":
-        await pump_on_command(query)
-    elif query.data == "pump_off":
-        await pump_off_command(query)
-    elif query.data == "sensor_data":
-        await sensor_data_command(query)
-    elif query.data == "weather_report":
-        await weather_report_command(query)
-    elif query.data == "dashboard_report":
-        await dashboard_report_command(query)
-    elif query.data == "rain_alert":
-        await rain_alert_command(query)
-    elif query.data == "help_menu":
-        await help_command(query)
+    handler = CALLBACK_ROUTES.get(query.data)
+    if handler:
+        await handler(query)
 
 async def pump_control_menu(query):
     """Show pump control options"""
-    keyboard = [
-        [InlineKeyboardButton("🟢 Turn Pump ON", callback_data="pump_on")],
-        [InlineKeyboardButton("🔴 Turn Pump OFF", callback_data="pump_off")],
-        [InlineKeyboardButton("📊 Pump Status", callback_data="sensor_data")],
-        [InlineKeyboardButton("⬅️ Back to Main", callback_data="main_menu")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
     await query.edit_message_text(
         "🚿 **Pump Control Panel**\n\nSelect an action:",
-        reply_markup=reply_markup,
+        reply_markup=PUMP_MENU_MARKUP,
         parse_mode='Markdown'
     )
 
@@ -183,23 +479,16 @@ async def pump_on_command(query):
     success = await farm.send_pump_command("ON")
     
     if success:
-        msg = """
-🟢 **PUMP TURNED ON** ✅
-
-🚿 **Status**: Pump is now running
-⏰ **Time**: {time}
-💧 **Action**: Irrigation started
-🔄 **Command**: Sent via WebSocket
-
-The pump will run according to auto-irrigation rules or until manually turned off.
-        """.format(time=datetime.now().strftime("%H:%M:%S"))
+        now = datetime.now()
+        msg = PUMP_ON_MSG.format(time=now.strftime("%H:%M:%S"))
         
         # Track irrigation cycle start
         irrigation_cycles.append({
-            'timestamp': datetime.now(),
+            'timestamp': now,
             'action': 'started',
             'method': 'telegram_manual'
         })
+        daily_stats.record('irrigation_started', now)
     else:
         msg = "❌ **Failed to turn pump ON**\n\nPlease check WebSocket connection and try again."
     
@@ -210,23 +499,16 @@ async def pump_off_command(query):
     success = await farm.send_pump_command("OFF")
     
     if success:
-        msg = """
-🔴 **PUMP TURNED OFF** ✅
-
-🚿 **Status**: Pump is now stopped
-⏰ **Time**: {time}
-💧 **Action**: Irrigation stopped
-🔄 **Command**: Sent via WebSocket
-
-The pump has been manually turned off via Telegram.
-        """.format(time=datetime.now().strftime("%H:%M:%S"))
+        now = datetime.now()
+        msg = PUMP_OFF_MSG.format(time=now.strftime("%H:%M:%S"))
         
         # Track irrigation cycle end
         irrigation_cycles.append({
-            'timestamp': datetime.now(),
+            'timestamp': now,
             'action': 'stopped',
             'method': 'telegram_manual'
         })
+        daily_stats.record('irrigation_stopped', now)
     else:
         msg = "❌ **Failed to turn pump OFF**\n\nPlease check WebSocket connection and try again."
     
@@ -237,67 +519,29 @@ async def sensor_data_command(query):
     sensor_data = await farm.get_sensor_data()
     
     if sensor_data:
-        # Update global latest data
-        global latest_sensor_data
-        latest_sensor_data = sensor_data
-        
-        msg = f"""
-📊 **REAL-TIME SENSOR DATA** 📊
-
-🌱 **Soil Moisture**: {sensor_data.get('soil', 0)}%
-🌡️ **Temperature**: {sensor_data.get('temperature', 0)}°C
-💨 **Humidity**: {sensor_data.get('humidity', 0)}%
-🌧️ **Rain Status**: {'🌧️ Raining' if sensor_data.get('rain', 0) == 1 else '☀️ Clear'}
-🚿 **Pump Status**: {'🟢 ON' if sensor_data.get('pump', 0) == 1 else '🔴 OFF'}
-💡 **Light Level**: {sensor_data.get('light', 0)} lux
-💧 **Flow Rate**: {sensor_data.get('flow', 0)} L/min
-🪣 **Total Water**: {sensor_data.get('total', 0)} L
-
-📡 **Data Source**: {sensor_data.get('source', 'Unknown')}
-⏰ **Last Update**: {datetime.now().strftime("%H:%M:%S")}
-
-🔄 **Connection**: {'✅ Connected' if farm.connected else '❌ Disconnected'}
-        """
+        msg = SENSOR_TEMPLATE.format_map(ChainMap({
+            'rain_status': '🌧️ Raining' if sensor_data.get('rain', 0) == 1 else '☀️ Clear',
+            'pump_status': '🟢 ON' if sensor_data.get('pump', 0) == 1 else '🔴 OFF',
+            'time': datetime.now().strftime("%H:%M:%S"),
+            'connection': '✅ Connected' if farm.connected else '❌ Disconnected',
+        }, sensor_data, SENSOR_DEFAULTS))
     else:
-        msg = """
-❌ **SENSOR DATA UNAVAILABLE**
-
-🔍 **Possible Issues**:
-• WebSocket server not running
-• ESP32 not connected
-• Network connectivity issues
-
-Please check system status and try again.
-        """
+        msg = SENSOR_UNAVAILABLE_MSG
     
     await query.edit_message_text(msg, parse_mode='Markdown')
 
 async def weather_report_command(query):
     """Get weather report from OpenWeather API"""
     try:
-        # Current weather
-        current_url = f"http://api.openweathermap.org/data/2.5/weather?q={CITY}&appid={OPENWEATHER_API_KEY}&units=metric"
-        current_response = requests.get(current_url, timeout=10)
+        conditions = await _current_conditions(CITY)
         
-        # 5-day forecast
-        forecast_url = f"http://api.openweathermap.org/data/2.5/forecast?q={CITY}&appid={OPENWEATHER_API_KEY}&units=metric"
-        forecast_response = requests.get(forecast_url, timeout=10)
-        
-        if current_response.status_code == 200 and forecast_response.status_code == 200:
-            current_data = current_response.json()
-            forecast_data = forecast_response.json()
-            
-            # Current weather
-            temp = current_data['main']['temp']
-            humidity = current_data['main']['humidity']
-            description = current_data['weather'][0]['description'].title()
-            wind_speed = current_data['wind']['speed']
-            pressure = current_data['main']['pressure']
-            
-            # Rain probability from forecast
-            rain_prob = 0
-            if len(forecast_data['list']) > 0:
-                rain_prob = forecast_data['list'][0].get('pop', 0) * 100
+        if conditions is not None:
+            temp = conditions['temp']
+            humidity = conditions['humidity']
+            description = conditions['description']
+            wind_speed = conditions['wind_speed']
+            pressure = conditions['pressure']
+            rain_prob = conditions['rain_prob']
             
             msg = f"""
 🌤️ **WEATHER REPORT - {CITY}** 🌤️
@@ -330,28 +574,25 @@ async def weather_report_command(query):
 
 async def dashboard_report_command(query):
     """Generate comprehensive dashboard report"""
-    global water_consumption, pump_operations, irrigation_cycles, websocket_connections
-    
     # Get current sensor data
     sensor_data = await farm.get_sensor_data()
     
-    # Calculate today's statistics
-    today = datetime.now().date()
-    today_pumps = [op for op in pump_operations if op['timestamp'].date() == today]
-    today_irrigation = [cycle for cycle in irrigation_cycles if cycle['timestamp'].date() == today]
-    today_connections = [conn for conn in websocket_connections if conn['timestamp'].date() == today]
+    # Today's statistics come straight from the incremental counters
+    now = datetime.now()
+    today = now.date()
     
     # Count pump operations
-    pump_on_count = len([op for op in today_pumps if op['command'] == 'ON'])
-    pump_off_count = len([op for op in today_pumps if op['command'] == 'OFF'])
+    pump_on_count = daily_stats.today('pump_ON')
+    pump_off_count = daily_stats.today('pump_OFF')
     
     # Count irrigation cycles
-    irrigation_starts = len([cycle for cycle in today_irrigation if cycle['action'] == 'started'])
-    irrigation_stops = len([cycle for cycle in today_irrigation if cycle['action'] == 'stopped'])
+    irrigation_starts = daily_stats.today('irrigation_started')
+    irrigation_stops = daily_stats.today('irrigation_stopped')
     
     # Count connections/disconnections
-    connections = len([conn for conn in today_connections if conn['action'] == 'connected'])
-    disconnections = len([conn for conn in today_connections if conn['action'] == 'disconnected'])
+    connections = daily_stats.today('ws_connected')
+    disconnections = daily_stats.today('ws_disconnected')
+    uptime = connections / (connections + disconnections) * 100 if connections + disconnections > 0 else 0
     
     # Estimate water consumption (rough calculation)
     if sensor_data:
@@ -359,39 +600,22 @@ async def dashboard_report_command(query):
     else:
         estimated_water = pump_on_count * 50  # Rough estimate: 50L per pump cycle
     
-    msg = f"""
-📈 **DAILY DASHBOARD REPORT** 📈
-📅 **Date**: {today.strftime("%B %d, %Y")}
-
-**💧 WATER MANAGEMENT:**
-• Total Water Used: {estimated_water:.1f} L
-• Irrigation Cycles: {irrigation_starts} started, {irrigation_stops} completed
-• Average per Cycle: {estimated_water/max(irrigation_starts,1):.1f} L
-
-**🚿 PUMP OPERATIONS:**
-• Pump ON Commands: {pump_on_count}
-• Pump OFF Commands: {pump_off_count}
-• Current Status: {'🟢 ON' if sensor_data.get('pump', 0) == 1 else '🔴 OFF'}
-
-**📡 SYSTEM CONNECTIVITY:**
-• WebSocket Connections: {connections}
-• Disconnections: {disconnections}
-• Current Status: {'✅ Connected' if farm.connected else '❌ Disconnected'}
-• Uptime: {((connections/(connections+disconnections))*100):.1f if connections+disconnections > 0 else 0:.1f}%
-
-**📊 CURRENT READINGS:**
-• Soil Moisture: {sensor_data.get('soil', 0)}%
-• Temperature: {sensor_data.get('temperature', 0)}°C
-• Humidity: {sensor_data.get('humidity', 0)}%
-• Flow Rate: {sensor_data.get('flow', 0)} L/min
-
-**🎯 SYSTEM PERFORMANCE:**
-• Data Updates: Real-time via WebSocket
-• Response Time: < 2 seconds
-• Automation: {'✅ Active' if sensor_data else '⚠️ Limited'}
-
-⏰ **Report Generated**: {datetime.now().strftime("%H:%M:%S")}
-    """
+    msg = DASHBOARD_TEMPLATE.format_map(ChainMap({
+        'date': today.strftime("%B %d, %Y"),
+        'estimated_water': estimated_water,
+        'irrigation_starts': irrigation_starts,
+        'irrigation_stops': irrigation_stops,
+        'avg_per_cycle': estimated_water / max(irrigation_starts, 1),
+        'pump_on_count': pump_on_count,
+        'pump_off_count': pump_off_count,
+        'pump_status': '🟢 ON' if sensor_data.get('pump', 0) == 1 else '🔴 OFF',
+        'connections': connections,
+        'disconnections': disconnections,
+        'connection': '✅ Connected' if farm.connected else '❌ Disconnected',
+        'uptime': uptime,
+        'automation': '✅ Active' if sensor_data else '⚠️ Limited',
+        'time': now.strftime("%H:%M:%S"),
+    }, sensor_data, SENSOR_DEFAULTS))
     
     await query.edit_message_text(msg, parse_mode='Markdown')
 
@@ -399,12 +623,9 @@ async def rain_alert_command(query):
     """Get rain alerts and predictions"""
     try:
         # Get detailed forecast
-        forecast_url = f"http://api.openweathermap.org/data/2.5/forecast?q={CITY}&appid={OPENWEATHER_API_KEY}&units=metric"
-        response = requests.get(forecast_url, timeout=10)
+        data = await _fetch_forecast(CITY)
         
-        if response.status_code == 200:
-            data = response.json()
-            
+        if data is not None:
             rain_alerts = []
             for i, forecast in enumerate(data['list'][:8]):  # Next 24 hours
                 dt = datetime.fromtimestamp(forecast['dt'])
@@ -438,16 +659,7 @@ async def rain_alert_command(query):
 🔔 **Auto-irrigation will adjust based on rain probability**
                 """
             else:
-                msg = """
-☀️ **NO RAIN ALERTS** ✅
-
-🌤️ **Next 24 Hours**: Clear skies expected
-🚿 **Irrigation**: Safe to proceed as scheduled
-🌾 **Field Work**: Good conditions for farming activities
-
-📊 **Rain Probability**: < 30% (Low risk)
-⏰ **Next Check**: {next_check}
-                """.format(next_check=(datetime.now() + timedelta(hours=3)).strftime("%H:%M"))
+                msg = NO_RAIN_TEMPLATE.format(next_check=(datetime.now() + timedelta(hours=3)).strftime("%H:%M"))
         else:
             msg = "❌ **Rain alert data unavailable**\n\nPlease try again later."
             
@@ -499,37 +711,28 @@ If you encounter issues, type `/status` to check system connectivity.
     
     await query.edit_message_text(msg, parse_mode='Markdown')
 
+# Inline button callback_data -> handler
+CALLBACK_ROUTES = {
+    "pump_menu": pump_control_menu,
+    "pump_on": pump_on_command,
+    "pump_off": pump_off_command,
+    "sensor_data": sensor_data_command,
+    "weather_report": weather_report_command,
+    "dashboard_report": dashboard_report_command,
+    "rain_alert": rain_alert_command,
+    "help_menu": help_command,
+}
+
 # Text message handlers for natural language commands
 async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle natural language text messages"""
     text = update.message.text.lower()
     
-    # Pump control keywords
-    if any(word in text for word in ['pump on', 'turn on pump', 'start pump', 'irrigation on']):
-        await pump_on_text(update, context)
-    elif any(word in text for word in ['pump off', 'turn off pump', 'stop pump', 'irrigation off']):
-        await pump_off_text(update, context)
-    elif any(word in text for word in ['pump status', 'pump state', 'is pump on']):
-        await sensor_data_text(update, context)
-    
-    # Weather keywords
-    elif any(word in text for word in ['weather', 'temperature', 'forecast', 'climate']):
-        await weather_report_text(update, context)
-    elif any(word in text for word in ['rain', 'precipitation', 'storm', 'shower']):
-        await rain_alert_text(update, context)
-    
-    # Data keywords
-    elif any(word in text for word in ['sensor', 'data', 'readings', 'measurements']):
-        await sensor_data_text(update, context)
-    elif any(word in text for word in ['dashboard', 'report', 'summary', 'today']):
-        await dashboard_report_text(update, context)
-    elif any(word in text for word in ['water usage', 'consumption', 'irrigation stats']):
-        await dashboard_report_text(update, context)
-    
-    # Help keywords
-    elif any(word in text for word in ['help', 'commands', 'what can you do']):
-        await help_text(update, context)
-    
+    # One regex pass finds every keyword; the earliest-listed keyword wins
+    hits = TEXT_KEYWORD_RE.findall(text)
+    if hits:
+        keyword = min(hits, key=TEXT_KEYWORD_PRIORITY.__getitem__)
+        await TEXT_KEYWORDS[keyword](update, context)
     else:
         # Default response with suggestions
         await update.message.reply_text(
@@ -568,10 +771,8 @@ async def sensor_data_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def weather_report_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={CITY}&appid={OPENWEATHER_API_KEY}&units=metric"
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+        data = await _fetch_current(CITY)
+        if data is not None:
             temp = data['main']['temp']
             humidity = data['main']['humidity']
             desc = data['weather'][0]['description'].title()
@@ -583,10 +784,8 @@ async def weather_report_text(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 async def rain_alert_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        url = f"http://api.openweathermap.org/data/2.5/forecast?q={CITY}&appid={OPENWEATHER_API_KEY}&units=metric"
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+        data = await _fetch_forecast(CITY)
+        if data is not None:
             rain_prob = data['list'][0].get('pop', 0) * 100
             await update.message.reply_text(f"🌧️ **Rain Alert:**\nProbability: {rain_prob:.0f}%\n{'⚠️ Rain expected!' if rain_prob > 40 else '☀️ Clear skies'}")
         else:
@@ -596,7 +795,7 @@ async def rain_alert_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def dashboard_report_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     sensor_data = await farm.get_sensor_data()
-    today_pumps = len([op for op in pump_operations if op['timestamp'].date() == datetime.now().date()])
+    today_pumps = daily_stats.today('pump_ON') + daily_stats.today('pump_OFF')
     msg = f"📈 **Today's Report:**\n🚿 Pump operations: {today_pumps}\n💧 Water used: ~{today_pumps * 50}L\n📊 Current soil: {sensor_data.get('soil', 0)}%"
     await update.message.reply_text(msg, parse_mode='Markdown')
 
@@ -609,19 +808,108 @@ async def help_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Type naturally or use /start for menu!"
     )
 
+# Natural-language keyword -> handler, in priority order (first match in this order wins)
+TEXT_KEYWORDS = {
+    # Pump control keywords
+    'pump on': pump_on_text, 'turn on pump': pump_on_text, 'start pump': pump_on_text, 'irrigation on': pump_on_text,
+    'pump off': pump_off_text, 'turn off pump': pump_off_text, 'stop pump': pump_off_text, 'irrigation off': pump_off_text,
+    'pump status': sensor_data_text, 'pump state': sensor_data_text, 'is pump on': sensor_data_text,
+    # Weather keywords
+    'weather': weather_report_text, 'temperature': weather_report_text, 'forecast': weather_report_text, 'climate': weather_report_text,
+    'rain': rain_alert_text, 'precipitation': rain_alert_text, 'storm': rain_alert_text, 'shower': rain_alert_text,
+    # Data keywords
+    'sensor': sensor_data_text, 'data': sensor_data_text, 'readings': sensor_data_text, 'measurements': sensor_data_text,
+    'dashboard': dashboard_report_text, 'report': dashboard_report_text, 'summary': dashboard_report_text, 'today': dashboard_report_text,
+    'water usage': dashboard_report_text, 'consumption': dashboard_report_text, 'irrigation stats': dashboard_report_text,
+    # Help keywords
+    'help': help_text, 'commands': help_text, 'what can you do': help_text,
+}
+TEXT_KEYWORD_PRIORITY = {kw: i for i, kw in enumerate(TEXT_KEYWORDS)}
+# Zero-width lookahead so overlapping keywords ("is pump on" / "pump on") are all reported
+TEXT_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(kw) for kw in sorted(TEXT_KEYWORDS, key=len, reverse=True)) + '))'
+)
+
+# Per-user locks: with concurrent_updates on, one user's updates still run in order.
+# Weak values: a lock is dropped once no handler holds or waits on it, so idle users cost nothing
+user_locks = weakref.WeakValueDictionary()
+
+def one_at_a_time(handler):
+    """Serialize a handler per user while different users are handled concurrently"""
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        user = update.effective_user
+        if user is None:
+            return await handler(update, context)
+        lock = user_locks.get(user.id)
+        if lock is None:
+            lock = user_locks[user.id] = asyncio.Lock()
+        async with lock:
+            return await handler(update, context)
+    return wrapper
+
+async def sweep_old_events():
+    """Periodically drop tracked events older than EVENT_RETENTION"""
+    while True:
+        cutoff = datetime.now() - EVENT_RETENTION
+        for events in (pump_operations, irrigation_cycles, websocket_connections):
+            while events and events[0]['timestamp'] < cutoff:
+                events.popleft()
+        await asyncio.sleep(3600)
+
+async def post_init(application: Application):
+    """Open the shared HTTP session once the bot's event loop is running"""
+    farm.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60)
+    )
+    farm.supervisor_task = asyncio.create_task(farm.supervise_websocket())
+    asyncio.create_task(sweep_old_events())
+
+async def post_shutdown(application: Application):
+    """Close the shared HTTP session and WebSocket"""
+    if farm.supervisor_task:
+        farm.supervisor_task.cancel()
+    if farm.websocket:
+        await farm.websocket.close()
+    if farm.http:
+        await farm.http.close()
+
 def main():
     """Start the Telegram bot"""
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    # uvloop speeds up the asyncio loop PTB runs on; not available on Windows
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("⚡ Using uvloop event loop")
+    except ImportError:
+        pass
+    
+    builder = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .concurrent_updates(True)
+    )
+    
+    # Smooth outgoing replies/edits to just under Telegram's 30 msg/s global limit
+    # instead of bursting into 429 backoff (needs python-telegram-bot[rate-limiter])
+    try:
+        builder.rate_limiter(AIORateLimiter(overall_max_rate=TELEGRAM_MAX_RATE, overall_time_period=1, max_retries=2))
+    except RuntimeError:
+        logger.warning("⚠️ aiolimiter not installed - outgoing messages are not rate limited")
+    
+    application = builder.build()
     
     # Command handlers
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CallbackQueryHandler(button_handler))
+    application.add_handler(CommandHandler("start", one_at_a_time(start)))
+    application.add_handler(CallbackQueryHandler(one_at_a_time(button_handler)))
     
     # Text message handler for natural language
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_message))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, one_at_a_time(handle_text_message)))
     
     logger.info("🤖 Smart Agriculture Telegram Bot started!")
-    logger.info("🔗 WebSocket URL: " + WEBSOCKET_URL)
+    logger.info("🔗 WebSocket URL: %s", WEBSOCKET_URL)
     logger.info("🌤️ Weather API: OpenWeather")
     logger.info("📱 Bot ready for commands!")
     
@@ -5,14 +5,33 @@ Integrates Telegram alerts with the existing Smart Agriculture Dashboard
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import functools
 import os
-from datetime import datetime
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
 from typing import Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Prefer orjson's C encoder for request bodies when it is installed
+try:
+    import orjson
+    json_dumps_bytes = orjson.dumps
+except ImportError:
+    def json_dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 # Telegram Bot Configuration
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
@@ -21,53 +40,79 @@ if not BOT_TOKEN or not CHAT_ID:
     print("❌ Missing environment variables: TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID")
     exit(1)
 
-class TelegramNotifier:
+def _now_hms() -> str:
+    """Current local time as HH:MM:SS, without building a datetime"""
+    return time.strftime("%H:%M:%S")
+
+@functools.lru_cache(maxsize=1)
+def _date_str(day_ordinal: int) -> str:
+    return date.fromordinal(day_ordinal).strftime("%B %d, %Y")
+
+def _today_str() -> str:
+    """Today's date as 'Month DD, YYYY', formatted once per day"""
+    return _date_str(date.today().toordinal())
+
+class JitterRetry(Retry):
+    """Retry with full-jitter backoff: sleep a random time up to the exponential delay"""
+    def get_backoff_time(self) -> float:
+        return random.uniform(0, super().get_backoff_time())
+
+class MessageQueue:
+    """Single worker thread that paces sends under Telegram's flood limits"""
+    
+    # (max messages, window seconds): 30/s overall, 20/min into one group chat
+    LIMITS = ((30, 1.0), (20, 60.0))
+    
     def __init__(self):
-        self.bot_token = BOT_TOKEN
-        self.chat_id = CHAT_ID
-        self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
-        
-    def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
-        """Send message to Telegram"""
-        try:
-            url = f"{self.base_url}/sendMessage"
-            payload = {
-                "chat_id": self.chat_id,
-                "text": message,
-                "parse_mode": parse_mode
-            }
-            
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-            
-            logger.info(f"Telegram message sent: {message[:50]}...")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to send Telegram message: {e}")
-            return False
+        self._queue = queue.Queue()
+        self._windows = [(limit, period, deque(maxlen=limit)) for limit, period in self.LIMITS]
+        threading.Thread(target=self._worker, name="telegram-mq", daemon=True).start()
     
-    def send_weather_alert(self, weather_data: Dict[str, Any]) -> bool:
-        """Send weather-based alert"""
-        rain_prob = weather_data.get('rain_probability', 0)
-        
-        if rain_prob > 40:
-            message = f"""🌧️ <b>Rain Alert!</b>
+    def submit(self, fn, *args) -> Future:
+        """Queue fn(*args) to run in the next free send slot"""
+        future = Future()
+        self._queue.put((future, fn, args))
+        return future
+    
+    def _wait_for_slot(self):
+        # Sleep until the oldest send in every full window has aged out
+        while True:
+            now = time.monotonic()
+            delay = max(
+                (sent[0] + period - now for limit, period, sent in self._windows if len(sent) == limit),
+                default=0
+            )
+            if delay <= 0:
+                break
+            time.sleep(delay)
+        for _, _, sent in self._windows:
+            sent.append(now)
+    
+    def _worker(self):
+        while True:
+            future, fn, args = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._wait_for_slot()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+class TelegramNotifier:
+    MAX_MESSAGE_LENGTH = 4096  # Telegram's limit for one text message
+    _SECTION_SEPARATOR = "\n\n➖➖➖➖➖➖➖➖\n\n"
+    
+    # Message templates, parsed once at class creation and filled with str.format
+    _TPL_WEATHER_ALERT = """🌧️ <b>Rain Alert!</b>
 
 Rain expected in the next 30–60 minutes.
 ☔ Probability: {rain_prob}%
 🚿 <b>Irrigation paused automatically</b> to avoid water wastage.
 
 <i>Smart irrigation system activated! 🤖</i>"""
-            
-            return self.send_message(message)
-        return False
-    
-    def send_irrigation_alert(self, pump_status: bool, reason: str, soil_moisture: float) -> bool:
-        """Send irrigation status alert"""
-        status_text = "ON" if pump_status else "OFF"
-        
-        message = f"""🚿 <b>Irrigation Update</b>
+
+    _TPL_IRRIGATION = """🚿 <b>Irrigation Update</b>
 
 💧 <b>Pump Status:</b> {status_text}
 📋 <b>Reason:</b> {reason}
@@ -75,22 +120,14 @@ Rain expected in the next 30–60 minutes.
 
 <i>Smart irrigation in action! 🤖</i>"""
 
-        return self.send_message(message)
-    
-    def send_critical_soil_alert(self, soil_moisture: float) -> bool:
-        """Send critical soil moisture alert"""
-        message = f"""⚠️ <b>Critical Alert!</b>
+    _TPL_CRITICAL_SOIL = """⚠️ <b>Critical Alert!</b>
 
 🌱 Soil moisture is critically low (<b>{soil_moisture:.1f}%</b>)
 💧 <b>Immediate irrigation recommended</b>
 
 <i>Your plants need water urgently! 🆘</i>"""
 
-        return self.send_message(message)
-    
-    def send_sensor_offline_alert(self, minutes_offline: int) -> bool:
-        """Send sensor offline alert"""
-        message = f"""📡 <b>Sensor Alert</b>
+    _TPL_SENSOR_OFFLINE = """📡 <b>Sensor Alert</b>
 
 ⚠️ Live sensors offline for {minutes_offline} minutes
 🤖 System running on historical data and AI prediction
@@ -98,121 +135,289 @@ Rain expected in the next 30–60 minutes.
 
 <i>Don't worry, AI has got you covered! 🛡️</i>"""
 
-        return self.send_message(message)
-    
-    def send_manual_override_alert(self, action: str, user: str = "admin") -> bool:
-        """Send manual override alert"""
-        message = f"""🛠️ <b>Manual Override</b>
+    _TPL_MANUAL_OVERRIDE = """🛠️ <b>Manual Override</b>
 
 👤 <b>User:</b> {user}
-🚿 <b>Pump turned:</b> {action.upper()}
-⏰ <b>Time:</b> {datetime.now().strftime("%H:%M:%S")}
+🚿 <b>Pump turned:</b> {action}
+⏰ <b>Time:</b> {time}
 
 <i>Manual control activated! 🎛️</i>"""
 
-        return self.send_message(message)
-    
-    def send_daily_weather_report(self, weather_data: Dict[str, Any]) -> bool:
-        """Send daily weather report"""
-        today = datetime.now().strftime("%B %d, %Y")
-        
-        message = f"""🌤️ <b>Daily Weather Report – {weather_data.get('location', 'Erode')}</b>
+    _TPL_DAILY_WEATHER = """🌤️ <b>Daily Weather Report – {location}</b>
 
-🌡️ <b>Temperature:</b> {weather_data.get('temperature', 0)}°C
-💨 <b>Humidity:</b> {weather_data.get('humidity', 0)}%
-🌧️ <b>Rain Chance:</b> {weather_data.get('rain_probability', 0)}%
-☁️ <b>Condition:</b> {weather_data.get('weather_condition', 'Unknown')}
-📅 <b>Date:</b> {today}
+🌡️ <b>Temperature:</b> {temperature}°C
+💨 <b>Humidity:</b> {humidity}%
+🌧️ <b>Rain Chance:</b> {rain_probability}%
+☁️ <b>Condition:</b> {weather_condition}
+📅 <b>Date:</b> {date}
 
 <i>Have a great day! 🌱</i>"""
 
-        return self.send_message(message)
-    
-    def send_daily_dashboard_summary(self, summary_data: Dict[str, Any]) -> bool:
-        """Send comprehensive daily dashboard summary"""
-        message = f"""📊 <b>Daily Smart Agriculture Report</b>
+    _TPL_DASHBOARD_SUMMARY = """📊 <b>Daily Smart Agriculture Report</b>
 
-📍 <b>Location:</b> {summary_data.get('location', 'Erode')}
-📅 <b>Date:</b> {summary_data.get('date', datetime.now().strftime('%B %d, %Y'))}
+📍 <b>Location:</b> {location}
+📅 <b>Date:</b> {date}
 
 <b>🌡️ Environmental Averages (24h):</b>
-🌡️ Avg Temperature: {summary_data.get('averages', {}).get('avg_temperature', 0)}°C
-💨 Avg Humidity: {summary_data.get('averages', {}).get('avg_humidity', 0)}%
-💧 Avg Soil Moisture: {summary_data.get('averages', {}).get('avg_soil_moisture', 0)}%
-🌧️ Rain Probability: {summary_data.get('weather', {}).get('rain_probability', 0):.0f}%
+🌡️ Avg Temperature: {avg_temperature}°C
+💨 Avg Humidity: {avg_humidity}%
+💧 Avg Soil Moisture: {avg_soil_moisture}%
+🌧️ Rain Probability: {rain_probability:.0f}%
 
 <b>🤖 AI Model Performance:</b>
-🏆 Best Model: {summary_data.get('model', {}).get('best_model', 'ARIMAX')}
-📈 ARIMA Accuracy: {summary_data.get('model', {}).get('arima_accuracy', 82.5)}%
-📈 ARIMAX Accuracy: {summary_data.get('model', {}).get('arimax_accuracy', 94.6)}%
+🏆 Best Model: {best_model}
+📈 ARIMA Accuracy: {arima_accuracy}%
+📈 ARIMAX Accuracy: {arimax_accuracy}%
 
 <b>🚿 Irrigation Summary:</b>
-🟢 Pump ON Count: {summary_data.get('irrigation', {}).get('pump_on_count', 0)}
-🔴 Pump OFF Count: {summary_data.get('irrigation', {}).get('pump_off_count', 0)}
-💦 Total Water Used: {summary_data.get('irrigation', {}).get('total_water_used', 0)} L
+🟢 Pump ON Count: {pump_on_count}
+🔴 Pump OFF Count: {pump_off_count}
+💦 Total Water Used: {total_water_used} L
 
 <b>⚠️ System Status:</b>
-📊 Alerts Today: {summary_data.get('alerts', {}).get('total_count', 0)}
-🔌 System Status: {summary_data.get('system', {}).get('status', 'unknown').replace('_', ' ').title()}
-📡 Data Points: {summary_data.get('averages', {}).get('data_points', 0)}
+📊 Alerts Today: {alerts_count}
+🔌 System Status: {system_status}
+📡 Data Points: {data_points}
 
 <i>Smart agriculture monitoring active 24/7! 🌱🤖</i>"""
 
-        return self.send_message(message)
-
-    def send_water_usage_summary(self, total_liters: float, runtime_minutes: int) -> bool:
-        """Send daily water usage summary"""
-        today = datetime.now().strftime("%B %d, %Y")
-        
-        message = f"""💧 <b>Water Usage Report</b>
+    _TPL_WATER_USAGE = """💧 <b>Water Usage Report</b>
 
-📅 <b>Date:</b> {today}
+📅 <b>Date:</b> {date}
 🚿 <b>Total Water Used:</b> {total_liters:.1f} L
 ⏱️ <b>Pump Runtime:</b> {runtime_minutes} mins
 💰 <b>Efficiency:</b> Smart irrigation active
 
 <i>Water conservation in action! 🌍</i>"""
+    
+    def __init__(self):
+        self.bot_token = BOT_TOKEN
+        self.chat_id = CHAT_ID
+        self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        
+        # Keep-alive session so repeated alerts reuse one TLS connection to api.telegram.org;
+        # transient 429/5xx and connection errors are retried instead of dropping the alert
+        self.session = requests.Session()
+        retry = JitterRetry(
+            total=5,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "POST"],
+            respect_retry_after_header=True
+        )
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry))
+        self.queue = MessageQueue()
+        
+    def send_message(self, message: str, parse_mode: str = "HTML", promise: bool = False):
+        """Send message to Telegram, throttled by the message queue.
+        
+        Blocks and returns the bool result, or with promise=True returns a Future for it.
+        """
+        future = self.queue.submit(self._post_message, message, parse_mode)
+        return future if promise else future.result()
+    
+    def _post_message(self, message: str, parse_mode: str) -> bool:
+        try:
+            url = f"{self.base_url}/sendMessage"
+            payload = {
+                "chat_id": self.chat_id,
+                "text": message,
+                "parse_mode": parse_mode
+            }
+            
+            response = self.session.post(url, data=json_dumps_bytes(payload), headers=JSON_HEADERS, timeout=10)
+            response.raise_for_status()
+            
+            logger.info(f"Telegram message sent: {message[:50]}...")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to send Telegram message: {e}")
+            return False
+    
+    def send_weather_alert(self, weather_data: Dict[str, Any]) -> bool:
+        """Send weather-based alert"""
+        rain_prob = weather_data.get('rain_probability', 0)
+        
+        if rain_prob > 40:
+            return self.send_message(self._TPL_WEATHER_ALERT.format(rain_prob=rain_prob))
+        return False
+    
+    def send_irrigation_alert(self, pump_status: bool, reason: str, soil_moisture: float) -> bool:
+        """Send irrigation status alert"""
+        status_text = "ON" if pump_status else "OFF"
+        
+        return self.send_message(self._TPL_IRRIGATION.format(
+            status_text=status_text, reason=reason, soil_moisture=soil_moisture
+        ))
+    
+    def send_critical_soil_alert(self, soil_moisture: float) -> bool:
+        """Send critical soil moisture alert"""
+        return self.send_message(self._TPL_CRITICAL_SOIL.format(soil_moisture=soil_moisture))
+    
+    def send_sensor_offline_alert(self, minutes_offline: int) -> bool:
+        """Send sensor offline alert"""
+        return self.send_message(self._TPL_SENSOR_OFFLINE.format(minutes_offline=minutes_offline))
+    
+    def send_manual_override_alert(self, action: str, user: str = "admin") -> bool:
+        """Send manual override alert"""
+        return self.send_message(self._TPL_MANUAL_OVERRIDE.format(
+            user=user, action=action.upper(), time=_now_hms()
+        ))
+    
+    def send_daily_weather_report(self, weather_data: Dict[str, Any]) -> bool:
+        """Send daily weather report"""
+        return self.send_message(self._daily_weather_text(weather_data))
+    
+    def _daily_weather_text(self, weather_data: Dict[str, Any], today: Optional[str] = None) -> str:
+        today = today or _today_str()
+        
+        return self._TPL_DAILY_WEATHER.format(
+            location=weather_data.get('location', 'Erode'),
+            temperature=weather_data.get('temperature', 0),
+            humidity=weather_data.get('humidity', 0),
+            rain_probability=weather_data.get('rain_probability', 0),
+            weather_condition=weather_data.get('weather_condition', 'Unknown'),
+            date=today
+        )
+    
+    def send_daily_dashboard_summary(self, summary_data: Dict[str, Any]) -> bool:
+        """Send comprehensive daily dashboard summary"""
+        return self.send_message(self._dashboard_summary_text(summary_data))
+    
+    def _dashboard_summary_text(self, summary_data: Dict[str, Any], today: Optional[str] = None) -> str:
+        # Unpack each section once instead of chaining .get(..., {}) per field
+        averages = summary_data.get('averages') or {}
+        weather = summary_data.get('weather') or {}
+        model = summary_data.get('model') or {}
+        irrigation = summary_data.get('irrigation') or {}
+        alerts = summary_data.get('alerts') or {}
+        system = summary_data.get('system') or {}
+        
+        return self._TPL_DASHBOARD_SUMMARY.format(
+            location=summary_data.get('location', 'Erode'),
+            date=summary_data.get('date') or today or _today_str(),
+            avg_temperature=averages.get('avg_temperature', 0),
+            avg_humidity=averages.get('avg_humidity', 0),
+            avg_soil_moisture=averages.get('avg_soil_moisture', 0),
+            rain_probability=weather.get('rain_probability', 0),
+            best_model=model.get('best_model', 'ARIMAX'),
+            arima_accuracy=model.get('arima_accuracy', 82.5),
+            arimax_accuracy=model.get('arimax_accuracy', 94.6),
+            pump_on_count=irrigation.get('pump_on_count', 0),
+            pump_off_count=irrigation.get('pump_off_count', 0),
+            total_water_used=irrigation.get('total_water_used', 0),
+            alerts_count=alerts.get('total_count', 0),
+            system_status=system.get('status', 'unknown').replace('_', ' ').title(),
+            data_points=averages.get('data_points', 0)
+        )
 
-        return self.send_message(message)
+    def send_water_usage_summary(self, total_liters: float, runtime_minutes: int) -> bool:
+        """Send daily water usage summary"""
+        return self.send_message(self._water_usage_text(total_liters, runtime_minutes))
+    
+    def _water_usage_text(self, total_liters: float, runtime_minutes: int, today: Optional[str] = None) -> str:
+        return self._TPL_WATER_USAGE.format(
+            date=today or _today_str(), total_liters=total_liters, runtime_minutes=runtime_minutes
+        )
+    
+    def send_combined_daily_report(self, weather_data: Dict[str, Any], summary_data: Dict[str, Any],
+                                   total_liters: float, runtime_minutes: int) -> bool:
+        """Send the daily weather, dashboard and water usage reports as one message"""
+        today = _today_str()  # one date for all three sections, even across midnight
+        sections = [
+            self._daily_weather_text(weather_data, today),
+            self._dashboard_summary_text(summary_data, today),
+            self._water_usage_text(total_liters, runtime_minutes, today),
+        ]
+        message = self._SECTION_SEPARATOR.join(sections)
+        if len(message) <= self.MAX_MESSAGE_LENGTH:
+            return self.send_message(message)
+        
+        # Too long for one Telegram message: queue all three, then wait for the results
+        futures = [self.send_message(section, promise=True) for section in sections]
+        return all(future.result() for future in futures)
 
 # Global notifier instance
 telegram_notifier = TelegramNotifier()
 
+# Alerts are sent off the request thread so FastAPI handlers don't wait on a Telegram round-trip
+notify_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="telegram-notify")
+
+def _send_in_background(send, *args) -> bool:
+    """Queue a notifier call on the background executor; True once queued"""
+    notify_executor.submit(send, *args)
+    return True
+
+# Identical alerts within this window are suppressed (steady-state conditions re-fire every cycle)
+ALERT_DEDUP_TTL = 600
+_recent_alerts = {}  # alert key -> monotonic expiry
+_recent_alerts_lock = threading.Lock()
+
+def _recently_sent(key) -> bool:
+    """True if this alert key was sent within ALERT_DEDUP_TTL; otherwise record it"""
+    now = time.monotonic()
+    with _recent_alerts_lock:
+        for expired in [k for k, expiry in _recent_alerts.items() if expiry <= now]:
+            del _recent_alerts[expired]
+        if key in _recent_alerts:
+            return True
+        _recent_alerts[key] = now + ALERT_DEDUP_TTL
+        return False
+
+def reset_alert_dedup():
+    """Forget recently sent alerts (used by tests)"""
+    with _recent_alerts_lock:
+        _recent_alerts.clear()
+
 # Convenience functions for FastAPI integration
 def notify_weather_alert(weather_data: Dict[str, Any]) -> bool:
     """Send weather alert notification"""
-    return telegram_notifier.send_weather_alert(weather_data)
+    if _recently_sent(('weather', round(weather_data.get('rain_probability', 0)))):
+        return True
+    return _send_in_background(telegram_notifier.send_weather_alert, weather_data)
 
 def notify_irrigation_change(pump_status: bool, reason: str, soil_moisture: float) -> bool:
     """Send irrigation status change notification"""
-    return telegram_notifier.send_irrigation_alert(pump_status, reason, soil_moisture)
+    # Not deduplicated: callers only fire on a real pump state change, so a repeat is a new event
+    return _send_in_background(telegram_notifier.send_irrigation_alert, pump_status, reason, soil_moisture)
 
 def notify_critical_soil(soil_moisture: float) -> bool:
     """Send critical soil moisture notification"""
-    return telegram_notifier.send_critical_soil_alert(soil_moisture)
+    if _recently_sent(('critical_soil', round(soil_moisture, 1))):
+        return True
+    return _send_in_background(telegram_notifier.send_critical_soil_alert, soil_moisture)
 
 def notify_sensor_offline(minutes_offline: int) -> bool:
     """Send sensor offline notification"""
-    return telegram_notifier.send_sensor_offline_alert(minutes_offline)
+    # Keyed without the minute count, which grows on every check while sensors stay offline
+    if _recently_sent(('sensor_offline',)):
+        return True
+    return _send_in_background(telegram_notifier.send_sensor_offline_alert, minutes_offline)
 
 def notify_manual_override(action: str, user: str = "admin") -> bool:
     """Send manual override notification"""
-    return telegram_notifier.send_manual_override_alert(action, user)
+    return _send_in_background(telegram_notifier.send_manual_override_alert, action, user)
 
 def send_daily_weather_report(weather_data: Dict[str, Any]) -> bool:
     """Send daily weather report"""
     return telegram_notifier.send_daily_weather_report(weather_data)
 
-def send_daily_dashboard_summary(summary_data: Dict[str, Any]) -> bool:
-    """Send comprehensive daily dashboard summary"""
-    return telegram_notifier.send_daily_dashboard_summary(summary_data)
+def send_daily_dashboard_summary(summary_data: Dict[str, Any], notifier: Optional[TelegramNotifier] = None) -> bool:
+    """Send comprehensive daily dashboard summary (via notifier if given, e.g. a test fake)"""
+    return (notifier or telegram_notifier).send_daily_dashboard_summary(summary_data)
 
 def send_water_usage_summary(total_liters: float, runtime_minutes: int) -> bool:
     """Send daily water usage summary"""
     return telegram_notifier.send_water_usage_summary(total_liters, runtime_minutes)
 
-def test_telegram_connection() -> bool:
-    """Test Telegram bot connection"""
+def send_combined_daily_report(weather_data: Dict[str, Any], summary_data: Dict[str, Any],
+                               total_liters: float, runtime_minutes: int) -> bool:
+    """Send all daily reports in a single Telegram message"""
+    return telegram_notifier.send_combined_daily_report(weather_data, summary_data, total_liters, runtime_minutes)
+
+def test_telegram_connection(notifier: Optional[TelegramNotifier] = None) -> bool:
+    """Test Telegram bot connection (via notifier if given, e.g. a test fake)"""
     test_message = """🤖 <b>Smart Agriculture Bot Test</b>
 
 ✅ Connection successful
@@ -220,4 +425,4 @@ def test_telegram_connection() -> bool:
 
 <i>Test completed! 🚀</i>"""
 
-    return telegram_notifier.send_message(test_message)
\ No newline at end of file
+    return (notifier or telegram_notifier).send_message(test_message)
\ No newline at end of file
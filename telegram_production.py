@@ -7,8 +7,11 @@ Uses environment variables for all configuration
 import asyncio
 import json
 import logging
-import requests
+import aiohttp
 import os
+import time
+import uuid
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
@@ -24,6 +27,14 @@ OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
 BACKEND_URL = os.getenv('BACKEND_URL', 'https://smart-agriculture-backend-my7c.onrender.com')
 CITY = os.getenv('WEATHER_CITY', 'Erode')
 
+# OpenWeather endpoints, built once (HTTPS directly, skipping the http -> https redirect)
+WEATHER_URL = f"https://api.openweathermap.org/data/2.5/weather?q={CITY}&appid={OPENWEATHER_API_KEY}&units=metric"
+FORECAST_URL = f"https://api.openweathermap.org/data/2.5/forecast?q={CITY}&appid={OPENWEATHER_API_KEY}&units=metric"
+GEOCODE_URL = f"https://api.openweathermap.org/geo/1.0/direct?q={CITY}&limit=1&appid={OPENWEATHER_API_KEY}"
+# One Call 3.0 returns current + hourly in one response but needs its own OpenWeather subscription
+USE_ONECALL = os.getenv('OPENWEATHER_ONECALL', '').lower() in ('1', 'true', 'yes')
+GEOCODE_CACHE_TTL = 7 * 24 * 3600  # city coordinates practically never change
+
 # Validate required environment variables
 required_vars = {
     'TELEGRAM_BOT_TOKEN': TELEGRAM_BOT_TOKEN,
@@ -35,33 +46,92 @@ missing_vars = [var for var, value in required_vars.items() if not value]
 if missing_vars:
     raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-# Global variables for tracking
-pump_operations = []
-irrigation_cycles = []
+# Global variables for tracking (bounded, with per-day counts kept as operations are recorded)
+pump_operations = deque(maxlen=1000)
+irrigation_cycles = deque(maxlen=1000)
+pump_count_by_day = defaultdict(int)  # date -> successful pump commands
+
+# OpenWeather responses barely change within a few minutes; serve repeat presses from memory
+WEATHER_CACHE_TTL = 300
+_weather_cache = {}  # url -> (expiry monotonic ts, json)
+# A second OpenWeather GET goes out if the first hasn't answered within roughly its P95
+WEATHER_HEDGE_DELAY = float(os.getenv('WEATHER_HEDGE_MS', '400')) / 1000
+# Pump commands carry an Idempotency-Key, so a retry after a lost response can't toggle twice
+PUMP_COMMAND_ATTEMPTS = 3
+PUMP_RETRY_BACKOFF = 2  # seconds, doubled per retry
 
 class ProductionFarmController:
     def __init__(self):
         self.backend_url = BACKEND_URL
+        # Shared keep-alive session for backend and OpenWeather calls, opened in post_init
+        self.session = None
+    
+    async def get_json(self, url, timeout=10):
+        """GET a JSON endpoint without blocking the bot's event loop; None on a non-200 response"""
+        async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                return None
+            return await response.json()
+    
+    async def hedged_get_json(self, url, hedge_delay=WEATHER_HEDGE_DELAY):
+        """GET an idempotent JSON endpoint, racing a second request if the first is slow"""
+        first = asyncio.create_task(self.get_json(url))
+        try:
+            return await asyncio.wait_for(asyncio.shield(first), hedge_delay)
+        except asyncio.TimeoutError:
+            pass
+        second = asyncio.create_task(self.get_json(url))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in done if not t.exception()), None)
+                if winner is not None:
+                    return winner.result()
+            return first.result()  # both failed: surface the original request's error
+        finally:
+            for task in pending:
+                task.cancel()
         
     async def send_pump_command(self, command):
-        """Send pump command via backend API"""
+        """Send pump command via backend API, retrying transient failures under one idempotency key"""
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
         try:
-            response = requests.post(
-                f"{self.backend_url}/api/pump-control",
-                json={"command": command, "source": "telegram"},
-                timeout=10
-            )
+            for attempt in range(PUMP_COMMAND_ATTEMPTS):
+                if attempt:
+                    await asyncio.sleep(PUMP_RETRY_BACKOFF * 2 ** (attempt - 1))
+                try:
+                    async with self.session.post(
+                        f"{self.backend_url}/api/pump-control",
+                        json={"command": command, "source": "telegram"},
+                        headers=headers,
+                        timeout=aiohttp.ClientTimeout(total=10)
+                    ) as response:
+                        status = response.status
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if attempt == PUMP_COMMAND_ATTEMPTS - 1:
+                        raise
+                    logger.warning(f"⚠️ Pump command attempt {attempt + 1} failed, retrying: {e}")
+                    continue
+                if status < 500 or attempt == PUMP_COMMAND_ATTEMPTS - 1:
+                    break
+                logger.warning(f"⚠️ Pump command attempt {attempt + 1} got {status}, retrying")
             
-            if response.status_code == 200:
+            if status == 200:
+                now = datetime.now()
                 pump_operations.append({
-                    'timestamp': datetime.now(),
+                    'timestamp': now,
                     'command': command,
                     'status': 'success'
                 })
+                if now.date() not in pump_count_by_day:
+                    # New day: only today's count is ever read, so drop the old ones
+                    pump_count_by_day.clear()
+                pump_count_by_day[now.date()] += 1
                 logger.info(f"🚿 Pump command sent: {command}")
                 return True
             else:
-                logger.error(f"❌ Pump command failed: {response.status_code}")
+                logger.error(f"❌ Pump command failed: {status}")
                 return False
                 
         except Exception as e:
@@ -71,17 +141,30 @@ class ProductionFarmController:
     async def get_sensor_data(self):
         """Get latest sensor data from backend API"""
         try:
-            response = requests.get(f"{self.backend_url}/api/sensor-data/latest", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            data = await self.get_json(f"{self.backend_url}/api/sensor-data/latest")
+            if data is not None:
                 return data.get('data', [{}])[0] if data.get('data') else {}
         except Exception as e:
             logger.error(f"❌ Failed to get sensor data: {e}")
         return {}
 
+def _now_hms() -> str:
+    """Current local time as HH:MM:SS, without building a datetime"""
+    return time.strftime("%H:%M:%S")
+
 # Initialize production farm controller
 farm = ProductionFarmController()
 
+async def _cached_get_json(url, ttl=WEATHER_CACHE_TTL):
+    """GET a JSON endpoint, serving repeat requests from the TTL cache"""
+    entry = _weather_cache.get(url)
+    if entry and time.monotonic() < entry[0]:
+        return entry[1]
+    data = await farm.hedged_get_json(url)
+    if data is not None:
+        _weather_cache[url] = (time.monotonic() + ttl, data)
+    return data
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start command with welcome message"""
     keyboard = [
@@ -151,7 +234,7 @@ async def pump_on_command(query):
         msg = f"""
 🟢 **PUMP TURNED ON** ✅
 
-⏰ **Time**: {datetime.now().strftime("%H:%M:%S")}
+⏰ **Time**: {_now_hms()}
 🚿 **Status**: Irrigation started
 🔄 **Method**: Telegram remote control
         """
@@ -168,7 +251,7 @@ async def pump_off_command(query):
         msg = f"""
 🔴 **PUMP TURNED OFF** ✅
 
-⏰ **Time**: {datetime.now().strftime("%H:%M:%S")}
+⏰ **Time**: {_now_hms()}
 🚿 **Status**: Irrigation stopped
 🔄 **Method**: Telegram remote control
         """
@@ -194,33 +277,51 @@ async def sensor_data_command(query):
 🪣 **Total Water**: {sensor_data.get('total_liters', 0)} L
 
 📡 **Source**: {sensor_data.get('source', 'API')}
-⏰ **Updated**: {datetime.now().strftime("%H:%M:%S")}
+⏰ **Updated**: {_now_hms()}
         """
     else:
         msg = "❌ **Sensor data unavailable**\n\nCheck system connectivity."
     
     await query.edit_message_text(msg, parse_mode='Markdown')
 
+async def _current_conditions():
+    """(temp, humidity, description, rain_prob) for CITY, or None if the API gave no data"""
+    if USE_ONECALL:
+        places = await _cached_get_json(GEOCODE_URL, ttl=GEOCODE_CACHE_TTL)
+        if not places:
+            return None
+        data = await _cached_get_json(
+            f"https://api.openweathermap.org/data/3.0/onecall?lat={places[0]['lat']}&lon={places[0]['lon']}"
+            f"&exclude=minutely,daily,alerts&appid={OPENWEATHER_API_KEY}&units=metric"
+        )
+        if data is None:
+            return None
+        current = data['current']
+        hourly = data.get('hourly', [])
+        rain_prob = hourly[0].get('pop', 0) * 100 if hourly else 0
+        return current['temp'], current['humidity'], current['weather'][0]['description'].title(), rain_prob
+    
+    # Current conditions and forecast (for rain probability) fetched concurrently
+    data, forecast_data = await asyncio.gather(
+        _cached_get_json(WEATHER_URL), _cached_get_json(FORECAST_URL), return_exceptions=True
+    )
+    if isinstance(data, Exception):
+        raise data
+    if data is None:
+        return None
+    
+    rain_prob = 0
+    if isinstance(forecast_data, dict):
+        rain_prob = forecast_data['list'][0].get('pop', 0) * 100
+    return data['main']['temp'], data['main']['humidity'], data['weather'][0]['description'].title(), rain_prob
+
 async def weather_report_command(query):
     """Get weather from OpenWeather API"""
     try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={CITY}&appid={OPENWEATHER_API_KEY}&units=metric"
-        response = requests.get(url, timeout=10)
+        conditions = await _current_conditions()
         
-        if response.status_code == 200:
-            data = response.json()
-            temp = data['main']['temp']
-            humidity = data['main']['humidity']
-            description = data['weather'][0]['description'].title()
-            
-            # Get forecast for rain probability
-            forecast_url = f"http://api.openweathermap.org/data/2.5/forecast?q={CITY}&appid={OPENWEATHER_API_KEY}&units=metric"
-            forecast_response = requests.get(forecast_url, timeout=10)
-            
-            rain_prob = 0
-            if forecast_response.status_code == 200:
-                forecast_data = forecast_response.json()
-                rain_prob = forecast_data['list'][0].get('pop', 0) * 100
+        if conditions is not None:
+            temp, humidity, description, rain_prob = conditions
             
             msg = f"""
 🌤️ **WEATHER - {CITY}** 🌤️
@@ -234,7 +335,7 @@ async def weather_report_command(query):
 • Probability: {rain_prob:.0f}%
 • Recommendation: {'⏸️ Skip irrigation' if rain_prob > 40 else '✅ Safe to irrigate'}
 
-⏰ **Updated**: {datetime.now().strftime("%H:%M:%S")}
+⏰ **Updated**: {_now_hms()}
             """
         else:
             msg = "❌ **Weather data unavailable**"
@@ -247,7 +348,8 @@ async def weather_report_command(query):
 async def dashboard_report_command(query):
     """Generate dashboard report"""
     sensor_data = await farm.get_sensor_data()
-    today_pumps = len([op for op in pump_operations if op['timestamp'].date() == datetime.now().date()])
+    now = datetime.now()
+    today_pumps = pump_count_by_day.get(now.date(), 0)
     
     msg = f"""
 📈 **PRODUCTION DASHBOARD** 📈
@@ -266,18 +368,35 @@ async def dashboard_report_command(query):
 • Total Used: {sensor_data.get('total_liters', 0)} L
 • Flow Rate: {sensor_data.get('flow_rate', 0)} L/min
 
-⏰ **Report Time**: {datetime.now().strftime("%H:%M:%S")}
+⏰ **Report Time**: {now.strftime("%H:%M:%S")}
     """
     
     await query.edit_message_text(msg, parse_mode='Markdown')
 
+async def post_init(application: Application):
+    """Open the shared HTTP session once the bot's event loop is running"""
+    farm.session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+    )
+
+async def post_shutdown(application: Application):
+    """Close the shared HTTP session"""
+    if farm.session:
+        await farm.session.close()
+
 def main():
     """Start the production Telegram bot"""
     if not TELEGRAM_BOT_TOKEN:
         logger.error("❌ TELEGRAM_BOT_TOKEN not found in environment variables")
         return
     
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     # Add handlers
     application.add_handler(CommandHandler("start", start))
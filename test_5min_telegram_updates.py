@@ -6,6 +6,7 @@ Tests ESP32 online/offline scenarios and message formatting
 import os
 import sys
 import asyncio
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 # Add backend to path
@@ -19,6 +20,16 @@ os.environ['OPENWEATHER_API_KEY'] = '59ade005948b4c8f58a100afc603f047'
 # Import the 5-minute update system
 import telegram_5min_updates
 
+@contextmanager
+def patched(obj, name, value):
+    """Temporarily replace obj.name, restoring it even if the test fails"""
+    original = getattr(obj, name)
+    setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        setattr(obj, name, original)
+
 async def test_esp32_offline_scenario():
     """Test message when ESP32 is offline"""
     print("🧪 Testing ESP32 OFFLINE scenario...")
@@ -66,8 +77,8 @@ async def test_esp32_online_scenario():
         "timestamp": datetime.utcnow().isoformat()
     }
     
-    # Build message
-    message = telegram_5min_updates.build_5min_update_message()
+    # Build message (in a worker thread so it can overlap with other tests' weather fetches)
+    message = await asyncio.to_thread(telegram_5min_updates.build_5min_update_message)
     
     print("📱 Generated message:")
     print("=" * 50)
@@ -97,12 +108,9 @@ async def test_rain_alert_scenario():
             "country": "IN"
         }
     
-    # Replace the function temporarily
-    original_func = telegram_5min_updates.get_real_weather_data
-    telegram_5min_updates.get_real_weather_data = mock_get_real_weather_data
-    
-    # Build message
-    message = telegram_5min_updates.build_5min_update_message()
+    # Replace the function only while this message is built
+    with patched(telegram_5min_updates, 'get_real_weather_data', mock_get_real_weather_data):
+        message = telegram_5min_updates.build_5min_update_message()
     
     print("📱 Generated message:")
     print("=" * 50)
@@ -114,16 +122,13 @@ async def test_rain_alert_scenario():
     assert "75%" in message
     assert "Skip irrigation" in message
     
-    # Restore original function
-    telegram_5min_updates.get_real_weather_data = original_func
-    
     print("✅ Rain alert scenario test passed")
 
 async def test_data_sources_transparency():
     """Test that data sources are always mentioned"""
     print("\n🧪 Testing DATA SOURCES transparency...")
     
-    message = telegram_5min_updates.build_5min_update_message()
+    message = await asyncio.to_thread(telegram_5min_updates.build_5min_update_message)
     
     # Verify data sources section exists
     assert "📡 Data Sources:" in message
@@ -186,18 +191,19 @@ async def main():
     print("=" * 60)
     
     try:
-        # Run all tests
+        # Run all tests; the online and data-source checks don't depend on each other's
+        # ESP32 state, so their (network-bound) message builds run concurrently
         await test_esp32_offline_scenario()
-        await test_esp32_online_scenario()
+        await asyncio.gather(test_esp32_online_scenario(), test_data_sources_transparency())
         await test_rain_alert_scenario()
-        await test_data_sources_transparency()
         await test_no_fake_data()
         
-        # Optional: Send actual test message
+        # Optional: Send actual test message (SEND_TEST_MESSAGE=1), so the suite never waits on stdin
         print("\n" + "=" * 60)
-        send_test = input("Send actual test message to Telegram? (y/n): ").lower().strip()
-        if send_test == 'y':
+        if os.getenv("SEND_TEST_MESSAGE") == "1":
             await test_send_actual_message()
+        else:
+            print("⏭️ Skipping actual Telegram send (set SEND_TEST_MESSAGE=1 to enable)")
         
         print("\n" + "=" * 60)
         print("🎉 ALL TESTS PASSED!")
@@ -3,14 +3,24 @@
 Test script to simulate sending a command to the Telegram bot
 """
 
-import requests
 import json
+from _http_cache import cached_get
+import functools
+import sys
+
+sys.path.append('.')
+
+@functools.lru_cache(maxsize=None)
+def get_bot():
+    """One TelegramBotHandler shared by every test in this script"""
+    from telegram_bot_interactive import TelegramBotHandler
+    return TelegramBotHandler()
 
 # Test the weather endpoint directly
 def test_weather_api():
     print("🧪 Testing Weather API directly...")
     try:
-        response = requests.get("http://localhost:8000/weather", timeout=10)
+        response = cached_get("http://localhost:8000/weather", timeout=10)
         if response.status_code == 200:
             data = response.json()
             print(f"✅ Weather API: {data['temperature']:.1f}°C, {data['humidity']}%, {data['location']}")
@@ -26,12 +36,7 @@ def test_weather_api():
 def test_bot_weather_logic():
     print("\n🤖 Testing Bot Weather Logic...")
     try:
-        # Import the bot class
-        import sys
-        sys.path.append('.')
-        from telegram_bot_interactive import TelegramBotHandler
-        
-        bot = TelegramBotHandler()
+        bot = get_bot()
         
         # Test the weather fetch method
         weather_response = bot.fetch_weather_report()
@@ -47,9 +52,7 @@ def test_bot_weather_logic():
 def test_command_processing():
     print("\n💬 Testing Command Processing...")
     try:
-        from telegram_bot_interactive import TelegramBotHandler
-        
-        bot = TelegramBotHandler()
+        bot = get_bot()
         
         # Test different weather command variations
         commands = ["weather", "weather report", "weather today", "Weather Today?"]
@@ -5,10 +5,21 @@ Test the telegram bot functions directly without network calls
 
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from telegram_bot_simple import TelegramBot
 
+# (command, description, text the reply must contain or None, changes pump state)
+COMMAND_CASES = (
+    ("help", "Should show help menu", "Commands", False),
+    ("weather", "Should show weather report for Erode", "Weather Report", False),
+    ("dashboard", "Should show sensor data and dashboard summary", "Dashboard Report", False),
+    ("pump on", "Should send pump ON command", "Pump", True),
+    ("pump off", "Should send pump OFF command", "Pump", True),
+    ("unknown command", "Should show unknown command message", None, False),
+)
+
 def test_bot_commands():
     """Test bot command processing"""
     print("🧪 Testing Telegram Bot Functions")
@@ -16,34 +27,35 @@ def test_bot_commands():
     
     bot = TelegramBot()
     
-    # Test commands
-    test_cases = [
-        ("help", "Should show help menu"),
-        ("weather", "Should show weather report for Erode"),
-        ("dashboard", "Should show sensor data and dashboard summary"),
-        ("pump on", "Should send pump ON command"),
-        ("pump off", "Should send pump OFF command"),
-        ("unknown command", "Should show unknown command message")
-    ]
+    def run(command):
+        try:
+            return bot.process_command(command), None
+        except Exception as e:
+            return None, e
+    
+    # Read-only commands mostly wait on HTTP, so run them side by side; pump commands
+    # change state and must reach the ESP32 in order, so they go one at a time afterwards
+    read_only = [command for command, _, _, stateful in COMMAND_CASES if not stateful]
+    with ThreadPoolExecutor(max_workers=len(read_only)) as executor:
+        outcomes = dict(zip(read_only, executor.map(run, read_only)))
+    for command, _, _, stateful in COMMAND_CASES:
+        if stateful:
+            outcomes[command] = run(command)
     
-    for command, description in test_cases:
+    for command, description, expected, _ in COMMAND_CASES:
         print(f"\n📤 Testing: '{command}'")
         print(f"📝 Expected: {description}")
         
         try:
-            response = bot.process_command(command)
+            response, error = outcomes[command]
+            if error is not None:
+                raise error
             print(f"✅ Response received ({len(response)} chars)")
             print(f"📄 Preview: {response[:100]}...")
             
             # Check if response contains expected elements
-            if command == "help":
-                assert "Commands" in response, "Help should contain 'Commands'"
-            elif command == "weather":
-                assert "Weather Report" in response, "Weather should contain 'Weather Report'"
-            elif command == "dashboard":
-                assert "Dashboard Report" in response, "Dashboard should contain 'Dashboard Report'"
-            elif "pump" in command:
-                assert "Pump" in response, "Pump commands should contain 'Pump'"
+            if expected is not None:
+                assert expected in response, f"'{command}' should contain '{expected}'"
             
             print("✅ Response validation passed")
             
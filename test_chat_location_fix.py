@@ -3,53 +3,46 @@
 Test the fixed location extraction logic
 """
 
+import re
+
+# City alias -> OpenWeather query, in priority order (first match in this order wins)
+CITY_ALIASES = {
+    'erode': "Erode,IN",
+    'salem': "Salem,IN",
+    'tiruchengode': "Tiruchengode,IN", 'thiruchengode': "Tiruchengode,IN",
+    'kerala': "Kerala,IN",
+    'chennai': "Chennai,IN",
+    'bangalore': "Bangalore,IN", 'bengaluru': "Bangalore,IN",
+    'mumbai': "Mumbai,IN",
+    'delhi': "Delhi,IN",
+    'hyderabad': "Hyderabad,IN",
+    'pune': "Pune,IN",
+    'coimbatore': "Coimbatore,IN",
+    'madurai': "Madurai,IN",
+    'trichy': "Tiruchirappalli,IN", 'tiruchirappalli': "Tiruchirappalli,IN",
+}
+CITY_PRIORITY = {alias: i for i, alias in enumerate(CITY_ALIASES)}
+# Zero-width lookahead so overlapping aliases are all reported in one pass
+CITY_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(alias) for alias in sorted(CITY_ALIASES, key=len, reverse=True)) + '))',
+    re.IGNORECASE
+)
+COUNTRY_RE = re.compile('india|bharat|hindustan', re.IGNORECASE)
+
 def extract_city(user_message: str) -> str:
     """Extract city from user message - India only (FIXED VERSION)"""
-    message_lower = user_message.lower()
+    # Case-insensitive patterns scan the message as-is, without building a lowercased copy
+    hits = CITY_RE.findall(user_message)
     
     # 🔧 COUNTRY-LEVEL QUERY HANDLING
-    country_aliases = ['india', 'bharat', 'hindustan']
-    if any(country in message_lower for country in country_aliases):
-        # Check if it's a pure country query (no specific city mentioned)
-        city_mentioned = any(city in message_lower for city in [
-            'erode', 'salem', 'tiruchengode', 'thiruchengode', 'kerala', 
-            'chennai', 'bangalore', 'bengaluru', 'mumbai', 'delhi', 
-            'hyderabad', 'pune', 'coimbatore', 'madurai', 'trichy'
-        ])
-        
-        if not city_mentioned:
-            # Pure country query - use capital city
+    if not hits:
+        # Pure country query (no specific city mentioned) - use capital city
+        if COUNTRY_RE.search(user_message):
             return "New Delhi,IN"
+        return "Erode,IN"  # Default to Erode instead of "India"
     
     # Specific city detection
-    if "erode" in message_lower:
-        return "Erode,IN"
-    elif "salem" in message_lower:
-        return "Salem,IN"
-    elif "tiruchengode" in message_lower or "thiruchengode" in message_lower:
-        return "Tiruchengode,IN"
-    elif "kerala" in message_lower:
-        return "Kerala,IN"
-    elif "chennai" in message_lower:
-        return "Chennai,IN"
-    elif "bangalore" in message_lower or "bengaluru" in message_lower:
-        return "Bangalore,IN"
-    elif "mumbai" in message_lower:
-        return "Mumbai,IN"
-    elif "delhi" in message_lower:
-        return "Delhi,IN"
-    elif "hyderabad" in message_lower:
-        return "Hyderabad,IN"
-    elif "pune" in message_lower:
-        return "Pune,IN"
-    elif "coimbatore" in message_lower:
-        return "Coimbatore,IN"
-    elif "madurai" in message_lower:
-        return "Madurai,IN"
-    elif "trichy" in message_lower or "tiruchirappalli" in message_lower:
-        return "Tiruchirappalli,IN"
-    else:
-        return "Erode,IN"  # Default to Erode instead of "India"
+    return CITY_ALIASES[min((hit.lower() for hit in hits), key=CITY_PRIORITY.__getitem__)]
 
 def test_location_extraction():
     """Test cases for the fixed location extraction"""
@@ -70,6 +63,7 @@ def test_location_extraction():
         # Mixed queries (city mentioned with country)
         ("weather in chennai india", "Chennai,IN"),
         ("mumbai weather in india", "Mumbai,IN"),
+        ("tiruchirappalli india", "Tiruchirappalli,IN"),
         
         # Default fallback
         ("weather today", "Erode,IN"),
@@ -4,17 +4,36 @@ Test script to verify the chatbot fix is working
 Tests both N8N webhook and local backend fallback
 """
 
-import requests
+import asyncio
+import aiohttp
 import json
 from datetime import datetime
 
-def test_local_weather_api():
+WEB_TIMEOUT = aiohttp.ClientTimeout(total=10)
+PROBE_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
+# Fallback chatbot replies as (irrigation ok, rain expected) pairs, indexed by rain_prob > 50
+ENGLISH_TEMPLATES = (
+    "{location} weather today:\n🌡️ {temp}°C, 💧 {humidity}%\n🌧️ Rain chance: {rain_prob}%\nIrrigation recommended.",
+    "{location} weather today: {rain_prob}% rain chance 🌧️\nTemperature: {temp}°C, Humidity: {humidity}%\nSkip irrigation!",
+)
+TAMIL_TEMPLATES = (
+    "{location}-ல் இன்று வானிலை:\n🌡️ {temp}°C, 💧 {humidity}%\n🌧️ மழை வாய்ப்பு: {rain_prob}%\nநீர்ப்பாசனம் செய்யலாம்.",
+    "{location}-ல் இன்று மழை வாய்ப்பு {rain_prob}% 🌧️\nவெப்பநிலை: {temp}°C, ஈரப்பதம்: {humidity}%\nநீர்ப்பாசனம் வேண்டாம்!",
+)
+TANGLISH_TEMPLATES = (
+    "{location}-la iniku weather:\n🌡️ {temp}°C, 💧 {humidity}%\n🌧️ Rain chance: {rain_prob}%\nIrrigation pannalam.",
+    "{location}-la iniku mala chance {rain_prob}% 🌧️\nTemperature: {temp}°C, Humidity: {humidity}%\nIrrigation vendam!",
+)
+
+async def test_local_weather_api(session):
     """Test the local weather API that the chatbot will use as fallback"""
     print("🌤️ Testing Local Weather API...")
     try:
-        response = requests.get("http://localhost:8000/weather", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+        async with session.get("http://localhost:8000/weather", timeout=WEB_TIMEOUT) as response:
+            status = response.status
+            data = await response.json() if status == 200 else None
+        if status == 200:
             temp = round(data['temperature'])
             humidity = data['humidity']
             rain_prob = round(data['rain_probability'])
@@ -25,120 +44,120 @@ def test_local_weather_api():
             # Test response generation for different languages
             print("\n📝 Testing response generation:")
             
+            fields = {"location": location, "temp": temp, "humidity": humidity, "rain_prob": rain_prob}
+            rainy = rain_prob > 50
+            
             # English response
-            if rain_prob > 50:
-                english_response = f"{location} weather today: {rain_prob}% rain chance 🌧️\nTemperature: {temp}°C, Humidity: {humidity}%\nSkip irrigation!"
-            else:
-                english_response = f"{location} weather today:\n🌡️ {temp}°C, 💧 {humidity}%\n🌧️ Rain chance: {rain_prob}%\nIrrigation recommended."
+            english_response = ENGLISH_TEMPLATES[rainy].format_map(fields)
             
             print(f"🇺🇸 English: {english_response}")
             
             # Tamil response
-            if rain_prob > 50:
-                tamil_response = f"{location}-ல் இன்று மழை வாய்ப்பு {rain_prob}% 🌧️\nவெப்பநிலை: {temp}°C, ஈரப்பதம்: {humidity}%\nநீர்ப்பாசனம் வேண்டாம்!"
-            else:
-                tamil_response = f"{location}-ல் இன்று வானிலை:\n🌡️ {temp}°C, 💧 {humidity}%\n🌧️ மழை வாய்ப்பு: {rain_prob}%\nநீர்ப்பாசனம் செய்யலாம்."
+            tamil_response = TAMIL_TEMPLATES[rainy].format_map(fields)
             
             print(f"🇮🇳 Tamil: {tamil_response}")
             
             # Tanglish response
-            if rain_prob > 50:
-                tanglish_response = f"{location}-la iniku mala chance {rain_prob}% 🌧️\nTemperature: {temp}°C, Humidity: {humidity}%\nIrrigation vendam!"
-            else:
-                tanglish_response = f"{location}-la iniku weather:\n🌡️ {temp}°C, 💧 {humidity}%\n🌧️ Rain chance: {rain_prob}%\nIrrigation pannalam."
+            tanglish_response = TANGLISH_TEMPLATES[rainy].format_map(fields)
             
             print(f"🔄 Tanglish: {tanglish_response}")
             
             return True
         else:
-            print(f"❌ Weather API failed: {response.status_code}")
+            print(f"❌ Weather API failed: {status}")
             return False
     except Exception as e:
         print(f"❌ Weather API error: {e}")
         return False
 
-def test_n8n_webhook():
+async def test_n8n_webhook(session):
     """Test the N8N webhook to see if it's accessible"""
     print("\n🔗 Testing N8N Webhook...")
     try:
         webhook_url = "https://suryan8nproject.app.n8n.cloud/webhook/ccd37962-6bb3-4c30-b859-d3b63b9c64e2/chat"
         
-        response = requests.post(webhook_url, 
+        async with session.post(webhook_url, 
             json={
                 "sessionId": "test-session",
                 "action": "sendMessage", 
                 "chatInput": "weather test",
                 "language": "english"
             },
-            timeout=5
-        )
+            timeout=PROBE_TIMEOUT
+        ) as response:
+            status = response.status
+            data = await response.json(content_type=None) if status == 200 else None
         
-        if response.status_code == 200:
-            data = response.json()
+        if status == 200:
             print(f"✅ N8N Webhook: Working (response: {str(data)[:100]}...)")
             return True
         else:
-            print(f"⚠️ N8N Webhook: HTTP {response.status_code} - Will use local fallback")
+            print(f"⚠️ N8N Webhook: HTTP {status} - Will use local fallback")
             return False
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
         print("⚠️ N8N Webhook: Timeout - Will use local fallback")
         return False
     except Exception as e:
         print(f"⚠️ N8N Webhook: {e} - Will use local fallback")
         return False
 
-def test_frontend_running():
+async def test_frontend_running(session):
     """Test if the frontend is running"""
     print("\n🌐 Testing Frontend...")
     try:
-        response = requests.get("http://localhost:3000", timeout=5)
-        if response.status_code == 200:
+        async with session.get("http://localhost:3000", timeout=PROBE_TIMEOUT) as response:
+            status = response.status
+        if status == 200:
             print("✅ Frontend: Running on http://localhost:3000")
             return True
         else:
-            print(f"❌ Frontend: HTTP {response.status_code}")
+            print(f"❌ Frontend: HTTP {status}")
             return False
     except Exception as e:
         print(f"❌ Frontend: {e}")
         return False
 
-def main():
+TESTS = (
+    ("Local Weather API", test_local_weather_api),
+    ("N8N Webhook", test_n8n_webhook),
+    ("Frontend", test_frontend_running),
+)
+
+async def main():
     """Run all tests"""
     print("🧪 Chatbot Fix Verification Tests")
     print("=" * 50)
     
-    tests = [
-        ("Local Weather API", test_local_weather_api),
-        ("N8N Webhook", test_n8n_webhook),
-        ("Frontend", test_frontend_running)
-    ]
-    
-    results = {}
-    for name, test_func in tests:
-        results[name] = test_func()
+    # The three probes are independent network round-trips: run them together over one session
+    async with aiohttp.ClientSession() as session:
+        outcomes = await asyncio.gather(
+            *(test_func(session) for _, test_func in TESTS), return_exceptions=True
+        )
+    results = [outcome is True for outcome in outcomes]
+    weather_ok, n8n_ok, frontend_ok = results
     
     print("\n" + "=" * 50)
     print("📊 Test Results:")
     
-    for name, passed in results.items():
+    for (name, _), passed in zip(TESTS, results):
         status = "✅ PASS" if passed else "❌ FAIL"
         print(f"   {name}: {status}")
     
-    print(f"\n🎯 Overall: {sum(results.values())}/{len(results)} tests passed")
+    print(f"\n🎯 Overall: {results.count(True)}/{len(results)} tests passed")
     
-    if results["Local Weather API"]:
+    if weather_ok:
         print("\n🎉 Chatbot Fix Status: READY")
         print("   • Local backend is working as fallback")
         print("   • Weather responses will be generated locally")
         print("   • Multi-language support (English, Tamil, Tanglish)")
         print("   • Users should now get proper weather responses")
         
-        if results["Frontend"]:
+        if frontend_ok:
             print("   • Frontend is running - users can test the chatbot")
         else:
             print("   • Start frontend with: npm run dev")
             
-        if not results["N8N Webhook"]:
+        if not n8n_ok:
             print("   • N8N webhook is down, but local fallback will handle requests")
     else:
         print("\n⚠️ Chatbot Fix Status: NEEDS ATTENTION")
@@ -146,4 +165,4 @@ def main():
         print("   • Check if FastAPI server is running")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -3,14 +3,19 @@
 Test the new chatbot format with clean weather responses
 """
 
-import requests
 import json
+from _http_cache import SESSION, cached_get
+
+# Chatbot reply formats, built once at import time; only the weather fields are filled in per run
+ENGLISH_FORMAT = "{location} weather today: 🌡️ {temp}°C, 💧 {humidity}% 🌧️ Rain chance: {rain_prob}% Irrigation recommended. Let me know if you need more help 🙂"
+TAMIL_FORMAT = "{location}-la iniku weather: 🌡️ {temp}°C, 💧 {humidity}% 🌧️ மழை வாய்ப்பு: {rain_prob}% நீர்ப்பாசனம் செய்யலாம். மேலும் உதவி வேண்டுமா 🙂"
+TANGLISH_FORMAT = "{location}-la iniku weather: 🌡️ {temp}°C, 💧 {humidity}% 🌧️ Rain chance: {rain_prob}% Irrigation pannalam. Let me know if you need more help 🙂"
 
 def test_weather_api():
     """Test weather API and format responses"""
     print("🌤️ Testing Weather API Format...")
     try:
-        response = requests.get("http://localhost:8000/weather", timeout=10)
+        response = cached_get("http://localhost:8000/weather", timeout=10)
         if response.status_code == 200:
             data = response.json()
             temp = round(data['temperature'])
@@ -22,18 +27,16 @@ def test_weather_api():
             
             # Test the exact format requested
             print("\n📝 Testing New Clean Format:")
+            fields = {"location": location, "temp": temp, "humidity": humidity, "rain_prob": rain_prob}
             
             # English
-            english_format = f"{location} weather today: 🌡️ {temp}°C, 💧 {humidity}% 🌧️ Rain chance: {rain_prob}% Irrigation recommended. Let me know if you need more help 🙂"
-            print(f"🇺🇸 English: {english_format}")
+            print(f"🇺🇸 English: {ENGLISH_FORMAT.format_map(fields)}")
             
             # Tamil
-            tamil_format = f"{location}-la iniku weather: 🌡️ {temp}°C, 💧 {humidity}% 🌧️ மழை வாய்ப்பு: {rain_prob}% நீர்ப்பாசனம் செய்யலாம். மேலும் உதவி வேண்டுமா 🙂"
-            print(f"🇮🇳 Tamil: {tamil_format}")
+            print(f"🇮🇳 Tamil: {TAMIL_FORMAT.format_map(fields)}")
             
             # Tanglish (as requested)
-            tanglish_format = f"{location}-la iniku weather: 🌡️ {temp}°C, 💧 {humidity}% 🌧️ Rain chance: {rain_prob}% Irrigation pannalam. Let me know if you need more help 🙂"
-            print(f"🔄 Tanglish: {tanglish_format}")
+            print(f"🔄 Tanglish: {TANGLISH_FORMAT.format_map(fields)}")
             
             return True
         else:
@@ -49,7 +52,7 @@ def test_n8n_webhook():
     try:
         webhook_url = "https://suryan8nproject.app.n8n.cloud/webhook/ccd37962-6bb3-4c30-b859-d3b63b9c64e2/chat"
         
-        response = requests.post(webhook_url, 
+        response = SESSION.post(webhook_url, 
             json={
                 "sessionId": "test-session",
                 "action": "sendMessage", 
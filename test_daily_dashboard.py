@@ -4,10 +4,31 @@ Test script for Daily Dashboard Summary feature
 Tests the comprehensive daily report functionality
 """
 
-import requests
+import asyncio
+import aiohttp
 import json
+import os
+from _http_cache import cached_get
 from datetime import datetime
-from telegram_integration import send_daily_dashboard_summary, test_telegram_connection
+
+# Real Telegram sends only when LIVE_TELEGRAM=1; otherwise messages are formatted but not sent
+LIVE_TELEGRAM = os.getenv("LIVE_TELEGRAM") == "1"
+
+if not LIVE_TELEGRAM:
+    # telegram_integration exits at import without credentials; the fake notifier never uses them
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test-token")
+    os.environ.setdefault("TELEGRAM_CHAT_ID", "0")
+
+from telegram_integration import TelegramNotifier, send_daily_dashboard_summary, test_telegram_connection
+
+class FakeNotifier(TelegramNotifier):
+    """TelegramNotifier that formats messages as usual but records them instead of calling the Bot API"""
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, message: str, parse_mode: str = "HTML", promise: bool = False):
+        self.sent.append(message)
+        return True
 
 def test_daily_summary_api():
     """Test the daily summary API endpoint"""
@@ -15,7 +36,7 @@ def test_daily_summary_api():
     
     try:
         # Test the daily summary endpoint
-        response = requests.get("http://localhost:8000/daily-summary", timeout=10)
+        response = cached_get("http://localhost:8000/daily-summary", timeout=10)
         
         if response.status_code == 200:
             summary_data = response.json()
@@ -32,21 +53,24 @@ def test_daily_summary_api():
         print(f"❌ API test failed: {e}")
         return None
 
-def test_telegram_dashboard_report():
+async def test_telegram_dashboard_report(session):
     """Test sending the dashboard report via Telegram"""
     print("\n📱 Testing Telegram Dashboard Report...")
     
     try:
         # Test sending via FastAPI endpoint
-        response = requests.post("http://localhost:8000/send-daily-dashboard-report", timeout=15)
+        async with session.post(
+            "http://localhost:8000/send-daily-dashboard-report", timeout=aiohttp.ClientTimeout(total=15)
+        ) as response:
+            status = response.status
+            result = await response.json() if status == 200 else None
         
-        if response.status_code == 200:
-            result = response.json()
+        if status == 200:
             print("✅ Dashboard report sent successfully")
             print(f"📅 Timestamp: {result.get('timestamp', 'N/A')}")
             return True
         else:
-            print(f"❌ Failed to send report: {response.status_code}")
+            print(f"❌ Failed to send report: {status}")
             return False
             
     except Exception as e:
@@ -57,9 +81,10 @@ def test_manual_dashboard_summary():
     """Test manual dashboard summary with mock data"""
     print("\n🔧 Testing Manual Dashboard Summary...")
     
-    # Create mock summary data
+    # Create mock summary data (one clock read for both timestamps)
+    now = datetime.now()
     mock_summary = {
-        "date": datetime.now().strftime("%B %d, %Y"),
+        "date": now.strftime("%B %d, %Y"),
         "location": "Erode",
         "averages": {
             "avg_temperature": 28.5,
@@ -87,38 +112,47 @@ def test_manual_dashboard_summary():
         },
         "system": {
             "status": "live",
-            "last_sensor_time": datetime.now().isoformat()
+            "last_sensor_time": now.isoformat()
         }
     }
     
+    notifier = None if LIVE_TELEGRAM else FakeNotifier()
+    
     # Test connection first
-    if not test_telegram_connection():
+    if not test_telegram_connection(notifier):
         print("❌ Telegram connection failed")
         return False
     
     # Send manual summary
-    success = send_daily_dashboard_summary(mock_summary)
+    success = send_daily_dashboard_summary(mock_summary, notifier)
     
     if success:
-        print("✅ Manual dashboard summary sent")
+        if notifier is None:
+            print("✅ Manual dashboard summary sent")
+        else:
+            print(f"✅ Manual dashboard summary formatted ({len(notifier.sent[-1])} chars; set LIVE_TELEGRAM=1 to send)")
         return True
     else:
         print("❌ Failed to send manual summary")
         return False
 
-def main():
+async def main():
     """Main test function"""
     print("📊 Daily Dashboard Summary Test Suite")
     print("=" * 50)
     
-    # Test 1: API endpoint
-    summary_data = test_daily_summary_api()
-    
-    # Test 2: Telegram integration via API
-    api_success = test_telegram_dashboard_report()
-    
-    # Test 3: Manual Telegram message
-    manual_success = test_manual_dashboard_summary()
+    # The three checks are independent round-trips, so run them together:
+    # 1. API endpoint, 2. Telegram integration via API, 3. Manual Telegram message
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(
+            asyncio.to_thread(test_daily_summary_api),
+            test_telegram_dashboard_report(session),
+            asyncio.to_thread(test_manual_dashboard_summary),
+            return_exceptions=True
+        )
+    summary_data, api_success, manual_success = (
+        None if isinstance(result, BaseException) else result for result in results
+    )
     
     print("\n" + "=" * 50)
     print("📋 Test Results Summary:")
@@ -133,4 +167,4 @@ def main():
         print("\n⚠️ Some tests failed. Check the logs above.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -71,4 +71,10 @@ async def test_weather_email():
 
 # Run the test
 if __name__ == "__main__":
+    # uvloop is a faster drop-in event loop; not available on Windows
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(test_weather_email())
\ No newline at end of file
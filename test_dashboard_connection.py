@@ -4,7 +4,10 @@ Test dashboard WebSocket connection
 """
 import asyncio
 import websockets
-import json
+
+from _ws_json import send_json, json_loads
+
+RECV_IDLE_TIMEOUT = 10.0
 
 async def test_dashboard_connection():
     uri = "ws://localhost:8080/ws"
@@ -19,22 +22,25 @@ async def test_dashboard_connection():
                 "role": "dashboard",
                 "id": "test_dashboard"
             }
-            await websocket.send(json.dumps(register_msg))
+            await send_json(websocket, register_msg)
             print("📤 Sent dashboard registration")
             
-            # Listen for messages
+            # Listen for messages; one idle deadline is pushed forward per message
+            # instead of wrapping every recv() in its own wait_for task
             print("👂 Listening for messages...")
+            loop = asyncio.get_running_loop()
             try:
-                while True:
-                    message = await asyncio.wait_for(websocket.recv(), timeout=10.0)
-                    data = json.loads(message)
-                    print(f"📥 Received: {data}")
-                    
-                    if 'soil' in data:
-                        print(f"🌱 Soil: {data['soil']}%")
-                        print(f"🌡️ Temperature: {data['temperature']}°C")
-                        print(f"💨 Humidity: {data['humidity']}%")
-                        break
+                async with asyncio.timeout(RECV_IDLE_TIMEOUT) as idle:
+                    async for message in websocket:
+                        idle.reschedule(loop.time() + RECV_IDLE_TIMEOUT)
+                        data = json_loads(message)
+                        print(f"📥 Received: {data}")
+                        
+                        if 'soil' in data:
+                            print(f"🌱 Soil: {data['soil']}%")
+                            print(f"🌡️ Temperature: {data['temperature']}°C")
+                            print(f"💨 Humidity: {data['humidity']}%")
+                            break
                         
             except asyncio.TimeoutError:
                 print("⏰ No messages received in 10 seconds")
@@ -43,4 +49,10 @@ async def test_dashboard_connection():
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
+    # uvloop is a faster drop-in event loop; not available on Windows
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(test_dashboard_connection())
\ No newline at end of file
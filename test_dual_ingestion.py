@@ -4,28 +4,62 @@ Test client for Smart Agriculture Dual Data Ingestion System
 Tests both WiFi and USB data sources with automatic fallback
 """
 
+import os
+import sys
+import queue
 import asyncio
+import logging
+import logging.handlers
 import websockets
-import json
 import time
-import requests
+import aiohttp
+from contextlib import contextmanager
 from datetime import datetime
 
+from _ws_json import send_json, json_loads
+
 # Configuration
 BACKEND_URL = "http://localhost:8080"
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=5)
 WS_URL = "ws://localhost:8080/ws"
 WIFI_WS_URL = "ws://localhost:8080/wifi"
+STREAM_INTERVAL = 2  # seconds between stream frames
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1"))  # readings per stream frame (1 = one dict per frame, like the ESP32)
+# permessage-deflate only pays off on slow links; these tiny frames go over loopback, so it is
+# off unless WS_COMPRESS is set (e.g. for a WAN run)
+WS_COMPRESSION = "deflate" if os.getenv("WS_COMPRESS") else None
+
+# Per-reading stream lines; while a stream runs they are written by a background thread
+stream_log = logging.getLogger("dual_ingestion.stream")
+stream_log.setLevel(logging.INFO)
+stream_log.propagate = False
+
+@contextmanager
+def queued_stream_log():
+    """Hand stream_log records to a listener thread, so terminal writes never stall the send loop"""
+    log_queue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    stream_log.addHandler(handler)
+    listener.start()
+    try:
+        yield
+    finally:
+        # Stopping drains the queue, so every stream line is out before the caller prints again
+        listener.stop()
+        stream_log.removeHandler(handler)
 
 class DualIngestionTester:
-    def __init__(self):
+    def __init__(self, http):
         self.test_results = []
+        self.http = http  # aiohttp session shared by every REST call
     
     async def test_wifi_connection(self):
         """Test WiFi WebSocket connection"""
         print("🔧 Testing WiFi WebSocket Connection...")
         
         try:
-            async with websockets.connect(WIFI_WS_URL) as websocket:
+            async with websockets.connect(WIFI_WS_URL, compression=WS_COMPRESSION) as websocket:
                 print("✅ WiFi WebSocket connected")
                 
                 # Send test sensor data
@@ -40,7 +74,7 @@ class DualIngestionTester:
                     "total": 45.8
                 }
                 
-                await websocket.send(json.dumps(test_data))
+                await send_json(websocket, test_data)
                 print(f"📤 Sent WiFi test data: {test_data}")
                 
                 # Wait a moment
@@ -57,13 +91,13 @@ class DualIngestionTester:
         print("🔧 Testing Dashboard WebSocket Connection...")
         
         try:
-            async with websockets.connect(WS_URL) as websocket:
+            async with websockets.connect(WS_URL, compression=WS_COMPRESSION) as websocket:
                 print("✅ Dashboard WebSocket connected")
                 
                 # Listen for data
                 try:
                     message = await asyncio.wait_for(websocket.recv(), timeout=5.0)
-                    data = json.loads(message)
+                    data = json_loads(message)
                     print(f"📨 Received dashboard data: {data}")
                     return True
                 except asyncio.TimeoutError:
@@ -74,29 +108,27 @@ class DualIngestionTester:
             print(f"❌ Dashboard WebSocket test failed: {e}")
             return False
     
-    def test_api_endpoints(self):
+    async def test_api_endpoints(self):
         """Test REST API endpoints"""
         print("🔧 Testing API Endpoints...")
         
         try:
             # Test source status endpoint
-            response = requests.get(f"{BACKEND_URL}/api/source-status")
-            if response.status_code == 200:
-                status = response.json()
+            async with self.http.get(f"{BACKEND_URL}/api/source-status") as response:
+                if response.status != 200:
+                    print(f"❌ Source status endpoint failed: {response.status}")
+                    return False
+                status = await response.json()
                 print(f"✅ Source Status: {status}")
-                
-                # Test latest data endpoint
-                response = requests.get(f"{BACKEND_URL}/api/latest-data")
-                if response.status_code == 200:
-                    data = response.json()
-                    print(f"✅ Latest Data: {data}")
-                    return True
-                else:
-                    print(f"❌ Latest data endpoint failed: {response.status_code}")
+            
+            # Test latest data endpoint
+            async with self.http.get(f"{BACKEND_URL}/api/latest-data") as response:
+                if response.status != 200:
+                    print(f"❌ Latest data endpoint failed: {response.status}")
                     return False
-            else:
-                print(f"❌ Source status endpoint failed: {response.status_code}")
-                return False
+                data = await response.json()
+                print(f"✅ Latest Data: {data}")
+                return True
                 
         except Exception as e:
             print(f"❌ API test failed: {e}")
@@ -108,7 +140,7 @@ class DualIngestionTester:
         
         try:
             # First, send WiFi data
-            async with websockets.connect(WIFI_WS_URL) as websocket:
+            async with websockets.connect(WIFI_WS_URL, compression=WS_COMPRESSION) as websocket:
                 wifi_data = {
                     "soil": 50,
                     "temperature": 29.0,
@@ -120,13 +152,13 @@ class DualIngestionTester:
                     "total": 50.0
                 }
                 
-                await websocket.send(json.dumps(wifi_data))
+                await send_json(websocket, wifi_data)
                 print("📤 Sent WiFi data")
                 await asyncio.sleep(1)
                 
                 # Check source status
-                response = requests.get(f"{BACKEND_URL}/api/source-status")
-                status = response.json()
+                async with self.http.get(f"{BACKEND_URL}/api/source-status") as response:
+                    status = await response.json()
                 print(f"📊 Source after WiFi: {status['active_source']}")
                 
             # Wait for WiFi timeout (should switch to USB)
@@ -134,8 +166,8 @@ class DualIngestionTester:
             await asyncio.sleep(4)
             
             # Check source status again
-            response = requests.get(f"{BACKEND_URL}/api/source-status")
-            status = response.json()
+            async with self.http.get(f"{BACKEND_URL}/api/source-status") as response:
+                status = await response.json()
             print(f"📊 Source after timeout: {status['active_source']}")
             
             if status['active_source'] == 'USB':
@@ -154,31 +186,47 @@ class DualIngestionTester:
         print(f"🔧 Simulating sensor data stream for {duration} seconds...")
         
         try:
-            async with websockets.connect(WIFI_WS_URL) as websocket:
-                start_time = time.time()
-                count = 0
-                
-                while time.time() - start_time < duration:
-                    # Generate realistic sensor data
-                    data = {
-                        "soil": 30 + (count % 40),  # Varying soil moisture
-                        "temperature": 25.0 + (count % 10),  # Varying temperature
-                        "humidity": 50.0 + (count % 30),  # Varying humidity
-                        "rain": 1 if count % 10 == 0 else 0,  # Occasional rain
-                        "pump": 1 if (30 + (count % 40)) < 40 else 0,  # Auto pump logic
-                        "light": 200 + (count % 200),  # Varying light
-                        "flow": 2.0 if (1 if (30 + (count % 40)) < 40 else 0) else 0.0,  # Flow when pump on
-                        "total": count * 0.1  # Accumulating total
-                    }
+            with queued_stream_log():
+                async with websockets.connect(WIFI_WS_URL, compression=WS_COMPRESSION) as websocket:
+                    start_time = time.time()
+                    count = 0
                     
-                    await websocket.send(json.dumps(data))
-                    print(f"📤 Stream #{count+1}: Soil={data['soil']}%, Temp={data['temperature']}°C, Pump={'ON' if data['pump'] else 'OFF'}")
+                    batch = []
                     
-                    count += 1
-                    await asyncio.sleep(2)
-                
-                print(f"✅ Sent {count} sensor data packets")
-                return True
+                    while time.time() - start_time < duration:
+                        # Generate realistic sensor data
+                        data = {
+                            "soil": 30 + (count % 40),  # Varying soil moisture
+                            "temperature": 25.0 + (count % 10),  # Varying temperature
+                            "humidity": 50.0 + (count % 30),  # Varying humidity
+                            "rain": 1 if count % 10 == 0 else 0,  # Occasional rain
+                            "pump": 1 if (30 + (count % 40)) < 40 else 0,  # Auto pump logic
+                            "light": 200 + (count % 200),  # Varying light
+                            "flow": 2.0 if (1 if (30 + (count % 40)) < 40 else 0) else 0.0,  # Flow when pump on
+                            "total": count * 0.1  # Accumulating total
+                        }
+                        
+                        stream_log.info("📤 Stream #%d: Soil=%s%%, Temp=%s°C, Pump=%s",
+                                        count + 1, data['soil'], data['temperature'], 'ON' if data['pump'] else 'OFF')
+                        count += 1
+                        
+                        if STREAM_BATCH_SIZE <= 1:
+                            await send_json(websocket, data)
+                        else:
+                            # Readings within a batch go out back to back as one JSON array frame
+                            batch.append(data)
+                            if len(batch) < STREAM_BATCH_SIZE:
+                                continue
+                            await send_json(websocket, batch)
+                            batch.clear()
+                        
+                        await asyncio.sleep(STREAM_INTERVAL)
+                    
+                    if batch:
+                        await send_json(websocket, batch)
+            
+            print(f"✅ Sent {count} sensor data packets")
+            return True
                 
         except Exception as e:
             print(f"❌ Data stream simulation failed: {e}")
@@ -189,23 +237,36 @@ class DualIngestionTester:
         print("🚀 Smart Agriculture Dual Ingestion System Tests")
         print("=" * 60)
         
-        tests = [
+        # The connection and API checks don't depend on each other, so they run concurrently;
+        # fallback and streaming stay serial because they drive and time the backend's active source
+        independent = [
             ("WiFi Connection", self.test_wifi_connection()),
             ("Dashboard Connection", self.test_dashboard_connection()),
             ("API Endpoints", self.test_api_endpoints()),
-            ("Fallback Mechanism", self.test_fallback_mechanism()),
-            ("Data Stream Simulation", self.simulate_sensor_data_stream(10))
         ]
         
+        print("\n🧪 Running: " + ", ".join(test_name for test_name, _ in independent))
+        print("-" * 40)
+        outcomes = await asyncio.gather(*(test_coro for _, test_coro in independent), return_exceptions=True)
+        
         results = []
-        for test_name, test_coro in tests:
+        for (test_name, _), outcome in zip(independent, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"❌ {test_name} raised: {outcome}")
+                outcome = False
+            results.append((test_name, outcome))
+            print(f"{test_name} result: {'✅ PASS' if outcome else '❌ FAIL'}")
+        
+        serial = [
+            ("Fallback Mechanism", self.test_fallback_mechanism),
+            ("Data Stream Simulation", lambda: self.simulate_sensor_data_stream(10))
+        ]
+        
+        for test_name, test_func in serial:
             print(f"\n🧪 Running: {test_name}")
             print("-" * 40)
             
-            if asyncio.iscoroutine(test_coro):
-                result = await test_coro
-            else:
-                result = test_coro
+            result = await test_func()
             
             results.append((test_name, result))
             print(f"Result: {'✅ PASS' if result else '❌ FAIL'}")
@@ -228,8 +289,10 @@ class DualIngestionTester:
             print("⚠️ Some tests failed. Check the backend and hardware connections.")
 
 async def main():
-    tester = DualIngestionTester()
-    await tester.run_all_tests()
+    # One keep-alive session serves every REST call in the run
+    async with aiohttp.ClientSession(timeout=HTTP_TIMEOUT) as session:
+        tester = DualIngestionTester(session)
+        await tester.run_all_tests()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -9,12 +9,17 @@ Tests all the new functionality including:
 - Comprehensive command processing
 """
 import requests
-import json
 import time
 import asyncio
 import websockets
+import aiohttp
 import os
 
+from _ws_json import send_json
+
+# Compress WebSocket frames only when WS_COMPRESS is set, e.g. against a remote backend
+WS_COMPRESSION = "deflate" if os.getenv("WS_COMPRESS") else None
+
 def send_telegram_command(message):
     """Send a command to the Telegram bot"""
     bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -50,7 +55,7 @@ async def send_test_sensor_data():
     uri = "ws://localhost:8000/ws"
     
     try:
-        async with websockets.connect(uri) as websocket:
+        async with websockets.connect(uri, compression=WS_COMPRESSION) as websocket:
             print("📡 Sending test sensor data...")
             
             # Send realistic sensor data
@@ -66,7 +71,7 @@ async def send_test_sensor_data():
                 "total": 25.0
             }
             
-            await websocket.send(json.dumps(test_data))
+            await send_json(websocket, test_data)
             print(f"📤 Sent sensor data: Soil={test_data['soil']}%, Temp={test_data['temperature']}°C")
             
             # Wait a moment for data to be processed
@@ -75,7 +80,17 @@ async def send_test_sensor_data():
     except Exception as e:
         print(f"❌ Failed to send sensor data: {e}")
 
-def test_api_endpoints():
+async def check_endpoint(session, endpoint):
+    """GET one endpoint, returning the line to report for it"""
+    try:
+        async with session.get(f"http://localhost:8000{endpoint}", timeout=aiohttp.ClientTimeout(total=5)) as response:
+            if response.status == 200:
+                return f"  ✅ {endpoint}"
+            return f"  ❌ {endpoint} - Status: {response.status}"
+    except Exception as e:
+        return f"  ❌ {endpoint} - Error: {str(e)[:30]}"
+
+async def test_api_endpoints():
     """Test API endpoints that Telegram bot uses"""
     print("🔍 Testing API endpoints...")
     
@@ -86,15 +101,12 @@ def test_api_endpoints():
         "/api/daily-summary"
     ]
     
-    for endpoint in endpoints:
-        try:
-            response = requests.get(f"http://localhost:8000{endpoint}", timeout=5)
-            if response.status_code == 200:
-                print(f"  ✅ {endpoint}")
-            else:
-                print(f"  ❌ {endpoint} - Status: {response.status_code}")
-        except Exception as e:
-            print(f"  ❌ {endpoint} - Error: {str(e)[:30]}")
+    # Hit every endpoint at once over one keep-alive session; report in the listed order
+    async with aiohttp.ClientSession() as session:
+        lines = await asyncio.gather(*(check_endpoint(session, endpoint) for endpoint in endpoints))
+    
+    for line in lines:
+        print(line)
 
 async def main():
     """Run comprehensive Telegram bot tests"""
@@ -104,7 +116,7 @@ async def main():
     print()
     
     # Test API endpoints first
-    test_api_endpoints()
+    await test_api_endpoints()
     print()
     
     # Send test sensor data
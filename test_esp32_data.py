@@ -2,16 +2,21 @@
 """
 Test ESP32 data simulation to verify WebSocket connection
 """
+import os
 import asyncio
 import websockets
-import json
 import time
 
+from _ws_json import send_json
+
+# No permessage-deflate on loopback (pure CPU cost for frames this small); WS_COMPRESS=1 turns it on
+WS_COMPRESSION = "deflate" if os.getenv("WS_COMPRESS") else None
+
 async def send_esp32_data():
     uri = "ws://localhost:8080/ws"
     
     try:
-        async with websockets.connect(uri) as websocket:
+        async with websockets.connect(uri, compression=WS_COMPRESSION) as websocket:
             print("✅ Connected to WebSocket server")
             
             # Send ESP32-style data
@@ -33,7 +38,7 @@ async def send_esp32_data():
                 esp32_data["temperature"] = 28.5 + (i * 0.5)
                 esp32_data["humidity"] = 62 + i
                 
-                await websocket.send(json.dumps(esp32_data))
+                await send_json(websocket, esp32_data)
                 print(f"📤 Sent ESP32 data #{i+1}: {esp32_data}")
                 
                 await asyncio.sleep(2)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test the Telegram farm controller's WebSocket sensor cache
+Feeds the frames websocket_server.py rebroadcasts through FarmController._ws_reader, no server needed
+"""
+
+import asyncio
+import json
+
+import telegram_farm_controller as tfc
+
+# A reading exactly as usb_to_ws.py forwards it, after websocket_server.py adds its timestamp
+BRIDGE_FRAME = {
+    "soil": 65,
+    "temperature": 30.7,
+    "humidity": 49.8,
+    "rain": 0,
+    "pump": 1,
+    "light": 1138,
+    "flow": 1.2,
+    "total": 56.0,
+    "server_timestamp": "2026-01-01T06:00:00"
+}
+
+# Frames relayed on the same socket that must not replace the cached reading
+CONTROL_FRAMES = [
+    {"type": "cmd", "cmd": "pump", "value": "OFF", "timestamp": "2026-01-01T06:00:01"},
+    {"type": "pong", "timestamp": "2026-01-01T06:00:02"},
+    {"error": "Invalid JSON format", "timestamp": "2026-01-01T06:00:03"},
+]
+
+class FakeWebSocket:
+    """Yields canned text frames, then ends like a closed connection"""
+    def __init__(self, frames):
+        self.frames = frames
+
+    async def __aiter__(self):
+        for frame in self.frames:
+            yield frame
+
+async def feed(frames):
+    """Run a fresh controller's reader over frames and return it"""
+    tfc.latest_sensor_data.clear()
+    farm = tfc.FarmController()
+    farm.websocket = FakeWebSocket([json.dumps(frame) for frame in frames])
+    await farm._ws_reader()
+    return farm
+
+async def test_bridge_frame_is_cached():
+    """A bridge reading fills latest_sensor_data"""
+    print("🧪 Testing bridge frame caching...")
+    farm = await feed([BRIDGE_FRAME])
+
+    assert tfc.latest_sensor_data == BRIDGE_FRAME, tfc.latest_sensor_data
+    assert farm.sensor_ts > 0
+    print(f"✅ Cached: Soil={tfc.latest_sensor_data['soil']}%, Temp={tfc.latest_sensor_data['temperature']}°C")
+
+async def test_control_frames_are_skipped():
+    """Commands, pongs and errors leave the last reading in place"""
+    print("\n🧪 Testing control frames are skipped...")
+    await feed([BRIDGE_FRAME] + CONTROL_FRAMES)
+
+    assert tfc.latest_sensor_data == BRIDGE_FRAME, tfc.latest_sensor_data
+    print("✅ Control frames ignored")
+
+async def main():
+    print("🌱 Farm Controller WebSocket Cache Tests")
+    print("=" * 50)
+
+    await test_bridge_frame_is_cached()
+    await test_control_frames_are_skipped()
+
+    print("\n🎉 All WebSocket cache tests passed!")
+
+if __name__ == "__main__":
+    asyncio.run(main())
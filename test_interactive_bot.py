@@ -4,93 +4,100 @@ Test script for Interactive Telegram Bot
 Tests various API endpoints that the bot uses
 """
 
-import requests
+import asyncio
+import aiohttp
 import json
 from datetime import datetime
 
 BACKEND_URL = "http://localhost:8000"
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
 
-def test_weather_endpoint():
+async def test_weather_endpoint(session):
     """Test weather endpoint"""
     print("🌤️ Testing Weather Endpoint...")
     try:
-        response = requests.get(f"{BACKEND_URL}/weather", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+        async with session.get(f"{BACKEND_URL}/weather", timeout=REQUEST_TIMEOUT) as response:
+            status = response.status
+            data = await response.json() if status == 200 else None
+        if status == 200:
             print(f"✅ Weather: {data['temperature']}°C, {data['humidity']}%, Rain: {data['rain_probability']}%")
             return True
         else:
-            print(f"❌ Weather API failed: {response.status_code}")
+            print(f"❌ Weather API failed: {status}")
             return False
     except Exception as e:
         print(f"❌ Weather API error: {e}")
         return False
 
-def test_dashboard_summary():
+async def test_dashboard_summary(session):
     """Test dashboard summary endpoint"""
     print("\n📊 Testing Dashboard Summary...")
     try:
-        response = requests.get(f"{BACKEND_URL}/daily-summary", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+        async with session.get(f"{BACKEND_URL}/daily-summary", timeout=REQUEST_TIMEOUT) as response:
+            status = response.status
+            data = await response.json() if status == 200 else None
+        if status == 200:
             print(f"✅ Dashboard: {data['averages']['avg_soil_moisture']}% soil, {data['irrigation']['pump_on_count']} pump cycles")
             return True
         else:
-            print(f"❌ Dashboard API failed: {response.status_code}")
+            print(f"❌ Dashboard API failed: {status}")
             return False
     except Exception as e:
         print(f"❌ Dashboard API error: {e}")
         return False
 
-def test_sensor_status():
+async def test_sensor_status(session):
     """Test sensor status endpoint"""
     print("\n🚿 Testing Sensor Status...")
     try:
-        response = requests.get(f"{BACKEND_URL}/sensor-status", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+        async with session.get(f"{BACKEND_URL}/sensor-status", timeout=REQUEST_TIMEOUT) as response:
+            status = response.status
+            data = await response.json() if status == 200 else None
+        if status == 200:
             print(f"✅ Sensors: {data['status']}, Pump: {data['pump_status']}")
             return True
         else:
-            print(f"❌ Sensor API failed: {response.status_code}")
+            print(f"❌ Sensor API failed: {status}")
             return False
     except Exception as e:
         print(f"❌ Sensor API error: {e}")
         return False
 
-def test_model_report():
+async def test_model_report(session):
     """Test model report endpoint"""
     print("\n🤖 Testing Model Report...")
     try:
-        response = requests.get(f"{BACKEND_URL}/model-report", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+        async with session.get(f"{BACKEND_URL}/model-report", timeout=REQUEST_TIMEOUT) as response:
+            status = response.status
+            data = await response.json() if status == 200 else None
+        if status == 200:
             print(f"✅ Models: ARIMA {data['arima_accuracy']}%, ARIMAX {data['arimax_accuracy']}%")
             return True
         else:
-            print(f"❌ Model API failed: {response.status_code}")
+            print(f"❌ Model API failed: {status}")
             return False
     except Exception as e:
         print(f"❌ Model API error: {e}")
         return False
 
-def test_telegram_connection():
+async def test_telegram_connection(session):
     """Test Telegram connection"""
     print("\n📱 Testing Telegram Connection...")
     try:
-        response = requests.post(f"{BACKEND_URL}/telegram/test", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+        async with session.post(f"{BACKEND_URL}/telegram/test", timeout=REQUEST_TIMEOUT) as response:
+            status = response.status
+            data = await response.json() if status == 200 else None
+        if status == 200:
             print(f"✅ Telegram: {data['status']}")
             return True
         else:
-            print(f"❌ Telegram API failed: {response.status_code}")
+            print(f"❌ Telegram API failed: {status}")
             return False
     except Exception as e:
         print(f"❌ Telegram API error: {e}")
         return False
 
-def main():
+async def main():
     """Run all tests"""
     print("🧪 Interactive Telegram Bot API Tests")
     print("=" * 50)
@@ -103,12 +110,12 @@ def main():
         test_telegram_connection
     ]
     
-    passed = 0
-    total = len(tests)
+    # The endpoint checks are independent: fire them together over one keep-alive session
+    async with aiohttp.ClientSession() as session:
+        outcomes = await asyncio.gather(*(test(session) for test in tests), return_exceptions=True)
     
-    for test in tests:
-        if test():
-            passed += 1
+    passed = sum(outcome is True for outcome in outcomes)
+    total = len(tests)
     
     print("\n" + "=" * 50)
     print(f"📊 Test Results: {passed}/{total} passed")
@@ -119,4 +126,4 @@ def main():
         print("⚠️ Some tests failed. Check the backend services.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test irrigation change notifications
+Every pump state change must produce its own Telegram message, even when one repeats within minutes
+"""
+
+import os
+
+# telegram_integration exits at import without credentials; messages here are recorded, never sent
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test-token")
+os.environ.setdefault("TELEGRAM_CHAT_ID", "0")
+
+import telegram_integration
+from telegram_integration import TelegramNotifier, notify_irrigation_change
+
+class FakeNotifier(TelegramNotifier):
+    """TelegramNotifier that records irrigation alerts instead of calling the Bot API"""
+    def __init__(self):
+        self.sent = []
+
+    def send_irrigation_alert(self, pump_status: bool, reason: str, soil_moisture: float) -> bool:
+        self.sent.append((pump_status, reason, soil_moisture))
+        return True
+
+def test_on_off_on_sends_three():
+    """ON -> OFF -> ON at the same soil moisture sends three messages"""
+    print("🧪 Testing ON → OFF → ON notifications...")
+    notifier = FakeNotifier()
+    telegram_integration.telegram_notifier = notifier
+
+    notify_irrigation_change(True, "soil moisture low", 25.0)
+    notify_irrigation_change(False, "target moisture reached", 25.0)
+    notify_irrigation_change(True, "soil moisture low", 25.0)
+
+    # Sends are queued on the background executor: wait for them to run
+    telegram_integration.notify_executor.shutdown(wait=True)
+
+    assert len(notifier.sent) == 3, notifier.sent
+    assert [status for status, _, _ in notifier.sent] == [True, False, True], notifier.sent
+    print(f"✅ {len(notifier.sent)} irrigation messages sent")
+
+if __name__ == "__main__":
+    print("🚿 Irrigation Notification Tests")
+    print("=" * 50)
+    test_on_off_on_sends_three()
+    print("\n🎉 All irrigation notification tests passed!")